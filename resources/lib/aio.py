@@ -0,0 +1,61 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+import threading
+import typing as t
+import weakref
+
+
+@dataclass
+class Call:
+    """Отложенный вызов метода клиента провайдера, который обращается к хосту host."""
+    host: str
+    func: t.Callable[..., t.Any]
+    args: t.Tuple[t.Any, ...] = ()
+    kwargs: t.Dict[str, t.Any] = field(default_factory=dict)
+
+
+class AsyncClient:
+    """
+    Асинхронный слой над блокирующими клиентами провайдеров.
+
+    Клиенты уже держат пул соединений в своих HTTP сессиях, поэтому запросы выполняются
+    в общем пуле потоков, а число одновременных запросов к одному хосту в цикле событий ограничено per_host.
+    Ограничение проверяется до передачи вызова в пул, поэтому ожидающие вызовы не занимают его потоки.
+    """
+
+    def __init__(self, max_workers: int = 8, per_host: int = 4) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='uplayer-aio')
+        self._per_host = per_host
+        # Семафоры asyncio привязаны к циклу событий, а run() каждый раз создает новый цикл.
+        self._host_limits: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, t.Dict[str, asyncio.Semaphore]]' = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def _get_limit(self, host: str) -> asyncio.Semaphore:
+        with self._lock:
+            limits = self._host_limits.setdefault(asyncio.get_running_loop(), {})
+
+            if host not in limits:
+                limits[host] = asyncio.Semaphore(self._per_host)
+
+            return limits[host]
+
+    async def call(self, call: Call) -> t.Any:
+        """Выполняет вызов, не блокируя цикл событий."""
+        async with self._get_limit(call.host):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, partial(call.func, *call.args, **call.kwargs))
+
+    async def gather(self, *calls: Call, return_exceptions: bool = False) -> t.List[t.Any]:
+        """Выполняет вызовы параллельно и возвращает результаты в том же порядке."""
+        return await asyncio.gather(*(self.call(c) for c in calls), return_exceptions=return_exceptions)
+
+    def run(self, *calls: Call, return_exceptions: bool = False) -> t.List[t.Any]:
+        """Синхронный фасад для gather, который можно вызывать из обычных маршрутов плагина."""
+        return asyncio.run(self.gather(*calls, return_exceptions=return_exceptions))
+
+
+async_client = AsyncClient()
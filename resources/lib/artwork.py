@@ -0,0 +1,117 @@
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import mimetypes
+import os
+import threading
+import typing as t
+from urllib.parse import urlparse
+
+from kodi_useful import current_addon
+from kodi_useful.http.client import Session
+
+from .parsers import make_session
+
+
+class ArtworkCache:
+    """
+    Локальный кэш обложек и миниатюр.
+
+    Изображения загружаются параллельно и сохраняются в каталоге данных дополнения под именем,
+    равным хэшу содержимого, поэтому одинаковые картинки по разным ссылкам хранятся один раз.
+    Когда общий размер превышает max_size байт, удаляются файлы, которые дольше всех не использовались.
+    """
+
+    def __init__(self, max_size: int = 200 * 1024 * 1024, max_workers: int = 4) -> None:
+        self.max_size = max_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='uplayer-artwork')
+        self._http: t.Optional[Session] = None
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self) -> str:
+        path = current_addon.get_data_path('artwork')
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @property
+    def http(self) -> Session:
+        with self._lock:
+            if self._http is None:
+                # Изображения и так сохраняются на диск, HTTP кэш для них не нужен.
+                self._http = make_session(cache={'expire_after': 0})
+            return self._http
+
+    @staticmethod
+    def _get_extension(url: str, content_type: str) -> str:
+        extension = mimetypes.guess_extension(content_type.split(';')[0].strip()) if content_type else None
+        return extension or os.path.splitext(urlparse(url).path)[1] or '.jpg'
+
+    def download(self, url: str) -> str:
+        """Загружает изображение и возвращает путь к локальному файлу."""
+        response = self.http.get(url, allow_redirects=True)
+        response.raise_for_status()
+
+        content = response.content
+        filename = hashlib.sha1(content).hexdigest() + self._get_extension(
+            url, response.headers.get('Content-Type', ''),
+        )
+        path = os.path.join(self.directory, filename)
+
+        if os.path.exists(path):
+            os.utime(path)
+        else:
+            tmp_path = f'{path}.{threading.get_ident()}.tmp'
+
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+
+            os.replace(tmp_path, path)
+
+        return path
+
+    def evict(self) -> None:
+        """Удаляет самые давно использованные файлы, пока размер кэша больше max_size."""
+        files = []
+
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total_size = sum(size for _, size, _ in files)
+
+        for _, size, path in sorted(files):
+            if total_size <= self.max_size:
+                break
+
+            try:
+                os.remove(path)
+                total_size -= size
+            except OSError as err:
+                current_addon.logger.error(f'Failed to remove artwork {path!r}: {err}')
+
+    def fetch_many(self, urls: t.Iterable[str]) -> t.Dict[str, str]:
+        """
+        Параллельно загружает изображения и возвращает соответствие ссылки локальному пути.
+
+        Для ссылок, которые не удалось загрузить, возвращается исходная ссылка.
+        """
+        urls = list(dict.fromkeys(u for u in urls if u))
+        futures = {url: self._executor.submit(self.download, url) for url in urls}
+        result = {}
+
+        for url, future in futures.items():
+            try:
+                result[url] = future.result()
+            except Exception as err:
+                current_addon.logger.error(f'Failed to download artwork {url!r}: {err}')
+                result[url] = url
+
+        if futures:
+            self.evict()
+
+        return result
+
+
+artwork_cache = ArtworkCache()
@@ -0,0 +1,147 @@
+from datetime import timedelta
+import json
+import sqlite3
+import time
+import typing as t
+
+from kodi_useful import current_addon
+
+from .storage import get_connection
+
+
+class MetadataCache:
+    """
+    Постоянный кэш ответов API провайдеров в базе данных дополнения.
+
+    Записи хранятся под ключом "провайдер + тип объекта + параметры запроса",
+    имеют собственное время жизни и вытесняются по давности использования (LRU),
+    когда общий размер кэша превышает max_size байт.
+    """
+
+    def __init__(self, max_size: int = 20 * 1024 * 1024) -> None:
+        self.max_size = max_size
+
+    def _count(self, provider: str, kind: str, column: str) -> None:
+        get_connection().execute(
+            f'''
+            INSERT INTO cache_stats (provider, kind, {column}) VALUES (?, ?, 1)
+            ON CONFLICT(provider, kind) DO UPDATE SET {column} = {column} + 1
+            ''',
+            (provider, kind),
+        )
+
+    @staticmethod
+    def make_key(*args, **kwargs) -> str:
+        """Возвращает ключ записи по позиционным и именованным параметрам запроса."""
+        return json.dumps([args, kwargs], sort_keys=True, ensure_ascii=False, default=str)
+
+    def clear(self) -> None:
+        """Удаляет все записи и обнуляет счетчики."""
+        conn = get_connection()
+        conn.execute('DELETE FROM cache_entry')
+        conn.execute('DELETE FROM cache_stats')
+        conn.commit()
+
+    def evict(self) -> None:
+        """Удаляет просроченные записи, а затем самые давно использованные, пока кэш больше max_size."""
+        conn = get_connection()
+        conn.execute('DELETE FROM cache_entry WHERE expires <= ?', (time.time(),))
+
+        total_size = conn.execute('SELECT COALESCE(SUM(size), 0) FROM cache_entry').fetchone()[0]
+        excess = total_size - self.max_size
+
+        if excess > 0:
+            keys = []
+
+            for key, size in conn.execute('SELECT key, size FROM cache_entry ORDER BY accessed ASC'):
+                keys.append((key,))
+                excess -= size
+
+                if excess <= 0:
+                    break
+
+            conn.executemany('DELETE FROM cache_entry WHERE key = ?', keys)
+
+        conn.commit()
+
+    def get(self, provider: str, kind: str, key: str) -> t.Optional[t.Any]:
+        """Возвращает сохраненное значение или None, если записи нет или она просрочена."""
+        now = time.time()
+        conn = get_connection()
+        row = conn.execute(
+            'SELECT value FROM cache_entry WHERE key = ? AND expires > ?',
+            (f'{provider}:{kind}:{key}', now),
+        ).fetchone()
+
+        try:
+            if row is None:
+                self._count(provider, kind, 'misses')
+            else:
+                conn.execute('UPDATE cache_entry SET accessed = ? WHERE key = ?', (now, f'{provider}:{kind}:{key}'))
+                self._count(provider, kind, 'hits')
+            conn.commit()
+        except sqlite3.OperationalError as err:
+            # База данных может быть заблокирована записью из другого процесса (например, обновлением лент),
+            # время использования и счетчики не стоят того, чтобы из-за них не отдать значение.
+            conn.rollback()
+            current_addon.logger.debug(f'Failed to update cache access for {provider}:{kind}: {err}')
+
+        return None if row is None else json.loads(row[0])
+
+    def set(self, provider: str, kind: str, key: str, value: t.Any, ttl: timedelta) -> None:
+        """Сохраняет значение на время ttl; значение должно сериализоваться в JSON."""
+        if ttl.total_seconds() <= 0:
+            return None
+
+        now = time.time()
+        payload = json.dumps(value, ensure_ascii=False)
+
+        conn = get_connection()
+        conn.execute(
+            '''
+            INSERT OR REPLACE INTO cache_entry (key, provider, kind, value, size, expires, accessed)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''',
+            (
+                f'{provider}:{kind}:{key}', provider, kind, payload,
+                len(payload.encode('utf-8')), now + ttl.total_seconds(), now,
+            ),
+        )
+        conn.commit()
+
+        self.evict()
+
+    def get_or_fetch(
+        self,
+        provider: str,
+        kind: str,
+        key: str,
+        fetch: t.Callable[[], t.Any],
+        ttl: timedelta,
+    ) -> t.Any:
+        """Возвращает значение из кэша, а при промахе получает его через fetch и сохраняет."""
+        value = self.get(provider, kind, key)
+
+        if value is None:
+            value = fetch()
+
+            try:
+                self.set(provider, kind, key, value, ttl)
+            except Exception as err:
+                # Ошибка кэша не должна мешать показу полученных данных.
+                current_addon.logger.error(f'Failed to cache {provider}:{kind}: {err}')
+
+        return value
+
+    def stats(self) -> t.List[t.Dict[str, t.Any]]:
+        """Возвращает количество попаданий и промахов по каждому типу объектов."""
+        rows = get_connection().execute(
+            'SELECT provider, kind, hits, misses FROM cache_stats ORDER BY provider, kind',
+        ).fetchall()
+        return [
+            {'provider': provider, 'kind': kind, 'hits': hits, 'misses': misses}
+            for provider, kind, hits, misses in rows
+        ]
+
+
+metadata_cache = MetadataCache()
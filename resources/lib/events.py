@@ -0,0 +1,73 @@
+from collections import deque
+from dataclasses import asdict, dataclass, field
+import enum
+import threading
+import time
+import typing as t
+
+
+class EventType(enum.StrEnum):
+    CREATED = enum.auto()
+    UPDATED = enum.auto()
+    DELETED = enum.auto()
+    # Директория изменилась, но подробности неизвестны: клиенту нужно перечитать список.
+    INVALIDATE = enum.auto()
+
+
+@dataclass
+class ChangeEvent:
+    id: int
+    type: EventType
+    folder_id: t.Optional[int]
+    item: t.Dict[str, t.Any] = field(default_factory=dict)
+    ts: float = field(default_factory=time.time)
+
+    def as_dict(self) -> t.Dict[str, t.Any]:
+        return asdict(self)
+
+
+class ChangeFeed:
+    """
+    Журнал последних изменений элементов в памяти процесса.
+
+    Подписчики ждут новые события по идентификатору последнего полученного.
+    """
+
+    def __init__(self, max_events: int = 500) -> None:
+        self._events: t.Deque[ChangeEvent] = deque(maxlen=max_events)
+        self._last_id = 0
+        self._condition = threading.Condition()
+
+    @property
+    def last_id(self) -> int:
+        with self._condition:
+            return self._last_id
+
+    def publish(
+        self,
+        event_type: EventType,
+        folder_id: t.Optional[int],
+        item: t.Optional[t.Dict[str, t.Any]] = None,
+    ) -> ChangeEvent:
+        with self._condition:
+            self._last_id += 1
+            event = ChangeEvent(self._last_id, event_type, folder_id, item or {})
+            self._events.append(event)
+            self._condition.notify_all()
+        return event
+
+    def wait(self, after_id: int, timeout: float = 15) -> t.Tuple[t.List[ChangeEvent], bool]:
+        """
+        Возвращает события после after_id, ожидая их не дольше timeout секунд.
+
+        Второй элемент результата истинен, если часть событий уже вытеснена из журнала
+        и подписчику нужно перечитать данные целиком.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._last_id > after_id, timeout)
+            events = [e for e in self._events if e.id > after_id]
+            missed = bool(events) and events[0].id > after_id + 1
+            return events, missed
+
+
+change_feed = ChangeFeed()
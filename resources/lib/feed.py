@@ -0,0 +1,387 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+import json
+import random
+import threading
+import time
+import typing as t
+
+from kodi_useful import current_addon
+
+from .storage import close_connection, decode_token, encode_token, get_connection, Item, ItemType
+from .utils import import_string
+
+
+# Функции, которые возвращают первую страницу видео отслеживаемого источника.
+# Модули провайдеров импортируются только при первом обновлении источника этого типа.
+FEED_FETCHERS: t.Dict[str, str] = {
+    ItemType.BOOSTY_PROFILE: f'{__package__}.providers.boosty:fetch_feed',
+    ItemType.RUTUBE_CHANNEL: f'{__package__}.providers.rutube:fetch_feed',
+    ItemType.RUTUBE_PLAYLIST: f'{__package__}.providers.rutube:fetch_feed',
+    ItemType.YOUTUBE_CHANNEL: f'{__package__}.providers.youtube:fetch_feed',
+    ItemType.YOUTUBE_PLAYLIST: f'{__package__}.providers.youtube:fetch_feed',
+}
+
+# После ошибки источник обновляется повторно с экспоненциально растущей паузой, но не реже раза в сутки.
+FEED_MAX_BACKOFF = timedelta(days=1)
+
+# Пауза для провайдера, который ответил 429 без заголовка Retry-After.
+FEED_RATE_LIMIT_PAUSE = timedelta(minutes=15)
+
+# Видео, которые ушли с первой страницы источника, хранятся для общей ленты не дольше этого срока.
+FEED_RETENTION = timedelta(days=90)
+
+
+class QuotaExceeded(Exception):
+    """Провайдер ограничил число запросов; до момента retry_at к нему обращаться не нужно."""
+
+    def __init__(self, provider: str, retry_at: float) -> None:
+        super().__init__(f'{provider} quota exceeded until {datetime.fromtimestamp(retry_at)}')
+        self.provider = provider
+        self.retry_at = retry_at
+
+
+@dataclass
+class FeedPage:
+    """Первая страница видео источника, сохраненная при последнем фоновом обновлении."""
+    items: t.List[Item] = field(default_factory=list)
+    next_page: str = ''
+
+
+def to_utc(value: datetime) -> datetime:
+    """Приводит дату публикации к наивному времени UTC, в котором хранятся все даты в базе данных."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def get_first_page(source_id: int, page_size: int, max_age: t.Optional[timedelta] = None) -> t.Optional[FeedPage]:
+    """
+    Возвращает сохраненную первую страницу источника или None, если ее нужно запросить у провайдера.
+
+    Страница используется, только если она получена с тем же размером страницы и не старше max_age
+    (по умолчанию - два интервала обновления из настроек).
+    """
+    if max_age is None:
+        max_age = timedelta(minutes=current_addon.get_setting('feed.interval', int)) * 2
+
+    conn = get_connection()
+    source = conn.execute(
+        'SELECT refreshed, page_size, next_page FROM feed_source WHERE item_id = ?', (source_id,),
+    ).fetchone()
+
+    if source is None or source[1] != page_size or source[0] < time.time() - max_age.total_seconds():
+        return None
+
+    rows = conn.execute(
+        '''
+        SELECT item_type, title, description, url, thumbnail, cover, data, published
+        FROM feed_entry
+        WHERE source_id = ? AND position IS NOT NULL
+        ORDER BY position
+        ''',
+        (source_id,),
+    ).fetchall()
+
+    if not rows:
+        return None
+
+    items = [
+        Item(
+            item_type=ItemType(item_type),
+            is_folder=False,
+            title=title,
+            description=description,
+            url=url,
+            thumbnail=thumbnail,
+            cover=cover,
+            data=data,
+            ts=datetime.fromisoformat(published),
+        )
+        for item_type, title, description, url, thumbnail, cover, data, published in rows
+    ]
+
+    return FeedPage(items=items, next_page=source[2])
+
+
+def select_latest(limit: int, after: t.Optional[str] = None) -> FeedPage:
+    """
+    Возвращает новые видео всех отслеживаемых источников, начиная с самых свежих.
+
+    Видео, которое попало в несколько источников (например, в канал и его плейлист), выводится один раз.
+    Страницы выбираются по ключу (дата публикации, провайдер, идентификатор видео) после позиции after.
+    """
+    params: t.Dict[str, t.Any] = {'limit': limit + 1}
+    where = ''
+
+    if after:
+        try:
+            params['published'], params['provider'], params['video_id'] = map(str, decode_token(after))
+        except (TypeError, ValueError) as err:
+            raise ValueError(f'Invalid page cursor: {after!r}') from err
+
+        where = 'WHERE (v.published, v.provider, v.video_id) < (:published, :provider, :video_id)'
+
+    rows = get_connection().execute(
+        f'''
+        SELECT
+            v.published, v.provider, v.video_id, s.title,
+            e.item_type, e.title, e.description, e.url, e.thumbnail, e.cover, e.data
+        FROM feed_video AS v
+        JOIN feed_entry AS e ON e.source_id = v.source_id AND e.video_id = v.video_id
+        JOIN item AS s ON s.id = v.source_id
+        {where}
+        ORDER BY v.published DESC, v.provider DESC, v.video_id DESC
+        LIMIT :limit
+        ''',
+        params,
+    ).fetchall()
+
+    items = [
+        Item(
+            item_type=ItemType(item_type),
+            is_folder=False,
+            title=title,
+            description='\n\n'.join(filter(None, (f'[B]{channel}[/B]', description))),
+            url=url,
+            thumbnail=thumbnail,
+            cover=cover,
+            data=data,
+            ts=datetime.fromisoformat(published),
+        )
+        for published, _, _, channel, item_type, title, description, url, thumbnail, cover, data in rows[:limit]
+    ]
+    next_page = encode_token(rows[limit - 1][:3]) if len(rows) > limit else ''
+
+    return FeedPage(items=items, next_page=next_page)
+
+
+class FeedRefresher:
+    """
+    Фоновое обновление отслеживаемых каналов, плейлистов и профилей.
+
+    Сервис периодически запрашивает первую страницу каждого источника из таблицы item и сохраняет
+    видео в таблицу feed_entry, чтобы плагин выводил их из базы данных без запросов к провайдеру.
+    За один проход обновляется не больше batch_size источников с паузой request_delay между запросами;
+    после ошибки источник откладывается с экспоненциальной задержкой, а провайдер, исчерпавший квоту,
+    пропускается до ее восстановления.
+    """
+
+    def __init__(self, batch_size: int = 10, poll_interval: float = 30, request_delay: float = 1) -> None:
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.request_delay = request_delay
+        self.interval = timedelta(hours=1)
+        self._paused: t.Dict[str, float] = {}
+        self._stop = threading.Event()
+        self._thread: t.Optional[threading.Thread] = None
+
+    def configure(self, enabled: bool, interval: timedelta) -> None:
+        """Задает интервал обновления и запускает или останавливает фоновый поток."""
+        self.interval = interval
+
+        if not enabled:
+            self.stop()
+        elif self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='uplayer-feed', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        try:
+            while not self._stop.wait(self.poll_interval):
+                try:
+                    self.refresh_due()
+                except Exception as err:
+                    current_addon.logger.error(f'Failed to refresh feeds: {err}')
+        finally:
+            close_connection()
+
+    def _get_due_sources(self) -> t.List[int]:
+        now = time.time()
+        item_types = [
+            str(i) for i in FEED_FETCHERS
+            if self._paused.get(i.split('_')[0], 0) <= now
+            and (i != ItemType.BOOSTY_PROFILE or current_addon.get_setting('boosty.enabled', bool))
+        ]
+
+        if not item_types:
+            return []
+
+        rows = get_connection().execute(
+            '''
+            SELECT item.id FROM item
+            LEFT JOIN feed_source ON feed_source.item_id = item.id
+            WHERE item.item_type IN ({}) AND COALESCE(feed_source.next_refresh, 0) <= ?
+            ORDER BY COALESCE(feed_source.next_refresh, 0)
+            LIMIT ?
+            '''.format(', '.join('?' * len(item_types))),
+            (*item_types, now, self.batch_size),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def refresh_due(self) -> int:
+        """Обновляет источники, у которых подошло время обновления, и возвращает их количество."""
+        refreshed = 0
+
+        for item_id in self._get_due_sources():
+            if self._stop.is_set():
+                break
+
+            item = Item.find(item_id)
+
+            if item is None or self._paused.get(item.provider, 0) > time.time():
+                continue
+
+            self.refresh(item)
+            refreshed += 1
+            self._stop.wait(self.request_delay)
+
+        return refreshed
+
+    def refresh(self, item: Item) -> None:
+        """Запрашивает первую страницу источника и сохраняет ее в базу данных."""
+        page_size = current_addon.get_setting('items_per_page', int)
+        fetch_feed = import_string(FEED_FETCHERS[item.item_type])
+
+        try:
+            entries, next_page = fetch_feed(item, page_size)
+        except Exception as err:
+            retry_at = self._get_retry_at(err)
+
+            if retry_at is not None:
+                current_addon.logger.info(f'Pause {item.provider} feeds until {datetime.fromtimestamp(retry_at)}')
+                self._paused[item.provider] = retry_at
+                self._save_source(item.id, next_refresh=retry_at, error=str(err))
+            else:
+                current_addon.logger.error(f'Failed to refresh feed for item {item.id}: {err}')
+                self._save_source(item.id, error=str(err))
+            return None
+
+        self._save_entries(item, entries, next_page, page_size)
+
+    @staticmethod
+    def _get_retry_at(err: Exception) -> t.Optional[float]:
+        if isinstance(err, QuotaExceeded):
+            return err.retry_at
+
+        response = getattr(err, 'response', None)
+
+        if getattr(response, 'status_code', None) != 429:
+            return None
+
+        retry_after = response.headers.get('Retry-After', '')
+
+        if retry_after.isdigit():
+            return time.time() + int(retry_after)
+
+        try:
+            return parsedate_to_datetime(retry_after).timestamp()
+        except (TypeError, ValueError):
+            return time.time() + FEED_RATE_LIMIT_PAUSE.total_seconds()
+
+    def _next_refresh(self) -> float:
+        # Случайная добавка разносит обновления источников, добавленных одновременно.
+        return time.time() + self.interval.total_seconds() * random.uniform(1, 1.1)
+
+    def _save_source(self, item_id: int, next_refresh: t.Optional[float] = None, error: str = '') -> None:
+        conn = get_connection()
+        row = conn.execute('SELECT failures FROM feed_source WHERE item_id = ?', (item_id,)).fetchone()
+        failures = (row[0] if row is not None else 0) + 1
+
+        if next_refresh is None:
+            backoff = min(self.interval * 2 ** (failures - 1), FEED_MAX_BACKOFF)
+            next_refresh = time.time() + backoff.total_seconds()
+
+        conn.execute(
+            '''
+            INSERT INTO feed_source (item_id, next_refresh, failures, error) VALUES (?, ?, ?, ?)
+            ON CONFLICT(item_id) DO UPDATE SET
+                next_refresh = excluded.next_refresh, failures = excluded.failures, error = excluded.error
+            ''',
+            (item_id, next_refresh, failures, error),
+        )
+        conn.commit()
+
+    def _save_entries(
+        self,
+        item: Item,
+        entries: t.Sequence[t.Dict[str, t.Any]],
+        next_page: str,
+        page_size: int,
+    ) -> None:
+        rows = [
+            {
+                'source_id': item.id,
+                'video_id': str(e['video_id']),
+                'provider': item.provider,
+                'item_type': str(e['item_type']),
+                'position': position,
+                'title': e['title'],
+                'description': e.get('description') or '',
+                'url': e.get('url') or '',
+                'thumbnail': e.get('thumbnail') or '',
+                'cover': e.get('cover') or '',
+                'data': json.dumps(e.get('data', {})),
+                'published': to_utc(e['published']).isoformat(' '),
+            }
+            for position, e in enumerate(entries)
+        ]
+
+        conn = get_connection()
+
+        try:
+            # Видео, которые ушли с первой страницы, остаются в таблице без позиции.
+            conn.execute('UPDATE feed_entry SET position = NULL WHERE source_id = ?', (item.id,))
+            conn.executemany(
+                '''
+                INSERT INTO feed_entry (
+                    source_id, video_id, provider, item_type, position,
+                    title, description, url, thumbnail, cover, data, published
+                ) VALUES (
+                    :source_id, :video_id, :provider, :item_type, :position,
+                    :title, :description, :url, :thumbnail, :cover, :data, :published
+                )
+                ON CONFLICT(source_id, video_id) DO UPDATE SET
+                    position = excluded.position,
+                    title = excluded.title,
+                    description = excluded.description,
+                    thumbnail = excluded.thumbnail,
+                    cover = excluded.cover,
+                    data = excluded.data
+                ''',
+                rows,
+            )
+            conn.execute(
+                'DELETE FROM feed_entry WHERE source_id = ? AND position IS NULL AND published < ?',
+                (item.id, (datetime.utcnow() - FEED_RETENTION).isoformat(' ')),
+            )
+            conn.execute(
+                '''
+                INSERT INTO feed_source (item_id, refreshed, next_refresh, failures, page_size, next_page, error)
+                VALUES (?, ?, ?, 0, ?, ?, '')
+                ON CONFLICT(item_id) DO UPDATE SET
+                    refreshed = excluded.refreshed,
+                    next_refresh = excluded.next_refresh,
+                    failures = 0,
+                    page_size = excluded.page_size,
+                    next_page = excluded.next_page,
+                    error = ''
+                ''',
+                (item.id, time.time(), self._next_refresh(), page_size, next_page or ''),
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+
+feed_refresher = FeedRefresher()
@@ -0,0 +1,126 @@
+from collections import OrderedDict
+from concurrent.futures import as_completed, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+import enum
+import threading
+import typing as t
+import uuid
+
+from kodi_useful import current_addon
+
+from .providers import media_provider
+from .storage import close_connection, Item
+
+
+class JobStatus(enum.StrEnum):
+    PENDING = enum.auto()
+    RUNNING = enum.auto()
+    DONE = enum.auto()
+    FAILED = enum.auto()
+
+
+class QueueFull(Exception):
+    """Очередь заданий заполнена."""
+
+
+@dataclass
+class ImportJob:
+    urls: t.List[str]
+    parent_id: t.Optional[int] = None
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: JobStatus = JobStatus.PENDING
+    resolved: int = 0
+    created: int = 0
+    errors: t.List[t.Dict[str, str]] = field(default_factory=list)
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (JobStatus.DONE, JobStatus.FAILED)
+
+    def as_dict(self) -> t.Dict[str, t.Any]:
+        data = asdict(self)
+        data['total'] = len(self.urls)
+        return data
+
+
+class ImportQueue:
+    """
+    Очередь фоновых заданий на массовое добавление ссылок.
+
+    Метаданные ссылок запрашиваются параллельно в общем пуле потоков ограниченного размера,
+    а готовые элементы сохраняются одной транзакцией.
+    """
+
+    def __init__(self, max_workers: int = 4, max_active_jobs: int = 4, max_finished_jobs: int = 20) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='uplayer-import')
+        self._jobs: t.Dict[str, ImportJob] = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_active_jobs = max_active_jobs
+        self._max_finished_jobs = max_finished_jobs
+
+    def _collect_finished(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.is_finished]
+
+        for job_id in finished[:max(0, len(finished) - self._max_finished_jobs)]:
+            del self._jobs[job_id]
+
+    def _run(self, job: ImportJob) -> None:
+        job.status = JobStatus.RUNNING
+        items = []
+
+        futures = {
+            self._executor.submit(media_provider.create_item, url, job.parent_id): url
+            for url in job.urls
+        }
+
+        for future in as_completed(futures):
+            try:
+                items.append(future.result())
+            except Exception as err:
+                current_addon.logger.error(f'Failed to import {futures[future]!r}: {err}')
+                job.errors.append({'url': futures[future], 'error': str(err)})
+            job.resolved += 1
+
+        try:
+            Item.insert_many(items)
+            job.created = len(items)
+            job.status = JobStatus.DONE
+        except Exception as err:
+            current_addon.logger.error(f'Failed to save imported items: {err}')
+            job.errors.append({'url': '', 'error': str(err)})
+            job.status = JobStatus.FAILED
+        finally:
+            close_connection()
+
+    def get(self, job_id: str) -> t.Optional[ImportJob]:
+        """Возвращает задание с указанным идентификатором."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def submit(
+        self,
+        urls: t.Sequence[str],
+        parent_id: t.Optional[int] = None,
+        errors: t.Sequence[t.Dict[str, str]] = (),
+    ) -> ImportJob:
+        """
+        Ставит ссылки в очередь на добавление и возвращает созданное задание.
+
+        errors - ошибки, найденные до запуска задания (например, отклоненные строки списка),
+        они выводятся вместе с ошибками загрузки ссылок.
+        """
+        with self._lock:
+            self._collect_finished()
+
+            if sum(not j.is_finished for j in self._jobs.values()) >= self._max_active_jobs:
+                raise QueueFull('Too many import jobs are running, try again later.')
+
+            job = ImportJob(urls=list(urls), parent_id=parent_id, errors=list(errors))
+            self._jobs[job.id] = job
+
+        threading.Thread(target=self._run, args=(job,), name=f'uplayer-job-{job.id}', daemon=True).start()
+
+        return job
+
+
+import_queue = ImportQueue()
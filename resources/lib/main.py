@@ -1,4 +1,6 @@
+import sys
 import typing as t
+from urllib.parse import parse_qs
 
 from kodi_useful import (
     current_addon,
@@ -9,9 +11,9 @@ from kodi_useful import (
 from kodi_useful.enums import Content, Scope
 import xbmcgui
 import xbmcplugin
-from YDWrapper import extract_source
 
-from . import pages
+from .pages import import_endpoint
+from .storage import close_connection
 
 
 @router.route
@@ -38,6 +40,8 @@ def play_video(addon: Addon, page_url: t.Annotated[str, Scope.QUERY]):
     # xbmcplugin.setResolvedUrl(addon.handle, True, item)
     # return
 
+    from YDWrapper import extract_source
+
     info = extract_source(page_url)
 
     item = xbmcgui.ListItem(info.title, offscreen=True)
@@ -64,5 +68,16 @@ def play_video(addon: Addon, page_url: t.Annotated[str, Scope.QUERY]):
     xbmcplugin.setResolvedUrl(addon.handle, True, item)
 
 
+def get_endpoint() -> t.Optional[str]:
+    """Возвращает имя маршрута из строки запроса плагина."""
+    query = parse_qs(sys.argv[2].lstrip('?')) if len(sys.argv) > 2 else {}
+    return query.get('r', [None])[0]
+
+
 def main():
-    current_addon.dispatch()
+    import_endpoint(get_endpoint())
+
+    try:
+        current_addon.dispatch()
+    finally:
+        close_connection()
@@ -1,4 +1,17 @@
-from . import boosty
-from . import items
-from . import rutube
-from . import youtube
+import importlib
+import typing as t
+
+
+def import_endpoint(endpoint: t.Optional[str] = None) -> None:
+    """
+    Импортирует только модуль страниц, в котором объявлен запрошенный маршрут.
+
+    Модуль главной страницы нужен всегда, остальные подгружаются по требованию,
+    чтобы не тянуть зависимости всех провайдеров при каждом открытии директории.
+    """
+    from . import items
+
+    module_name = (endpoint or '').rpartition('.')[0]
+
+    if module_name.startswith(f'{__name__}.'):
+        importlib.import_module(module_name)
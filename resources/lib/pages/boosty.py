@@ -25,13 +25,13 @@ from ..providers.boosty import (
 @url_construct.register(ItemType.BOOSTY_PROFILE)
 def get_url_for_profile(item: Item) -> str:
     """Возвращает ссылку для отображения медиа из профиля пользователя Boosty."""
-    return current_addon.url_for(index, username=item.data['username'])
+    return current_addon.url_for(index, username=item.get_data('username'))
 
 
 @url_construct.register(ItemType.BOOSTY_POST)
 def get_url_for_post(item: Item) -> str:
     """Возвращает ссылку для отображения медиа из поста пользователя Boosty."""
-    return current_addon.url_for(index, username=item.data['username'], post_id=item.data['post_id'])
+    return current_addon.url_for(index, username=item.get_data('username'), post_id=item.get_data('post_id'))
 
 
 @url_construct.register(ItemType.BOOSTY_VIDEO)
@@ -39,9 +39,9 @@ def get_url_for_media(item: Item) -> str:
     """Возвращает ссылку для отображения одного медиа из поста пользователя Boosty."""
     return current_addon.url_for(
         play_video_by_id,
-        username=item.data['username'],
-        post_id=item.data['post_id'],
-        media_id=item.data['media_id'],
+        username=item.get_data('username'),
+        post_id=item.get_data('post_id'),
+        media_id=item.get_data('media_id'),
     )
 
 
@@ -1,3 +1,4 @@
+import itertools
 import typing as t
 
 from kodi_useful import (
@@ -14,12 +15,22 @@ import xbmc
 import xbmcgui
 import xbmcplugin
 
-from ..storage import Item, ItemType
+from ..feed import select_latest
+from ..storage import Item, ItemRow, ItemType
 from ..providers import media_provider
 from ..utils import URLConstructor
 
 
 url_construct = URLConstructor()
+url_construct.register_module(
+    f'{__package__}.boosty', ItemType.BOOSTY_PROFILE, ItemType.BOOSTY_POST, ItemType.BOOSTY_VIDEO,
+)
+url_construct.register_module(
+    f'{__package__}.rutube', ItemType.RUTUBE_CHANNEL, ItemType.RUTUBE_PLAYLIST, ItemType.RUTUBE_VIDEO,
+)
+url_construct.register_module(
+    f'{__package__}.youtube', ItemType.YOUTUBE_CHANNEL, ItemType.YOUTUBE_PLAYLIST, ItemType.YOUTUBE_VIDEO,
+)
 
 
 @url_construct.register(ItemType.FOLDER)
@@ -34,6 +45,79 @@ def get_url_for_video_item(item: Item) -> str:
     return current_addon.url_for(play_video, url=item.url)
 
 
+def create_list_item(item: t.Union[Item, ItemRow]) -> xbmcgui.ListItem:
+    """Возвращает элемент списка Kodi с описанием, длительностью и обложками сохраненного элемента."""
+    gui_item = xbmcgui.ListItem(label=item.title)
+    info_tag = gui_item.getVideoInfoTag()
+    info_tag.setPlot('\n\n'.join((
+        f'[B]{current_addon.localize(item.provider)}[/B]' if item.item_type != ItemType.FOLDER else '',
+        item.description,
+    )))
+    info_tag.setDuration(item.get_data('duration', 0))
+    info_tag.setFirstAired(item.ts.strftime('%Y-%m-%d %H:%M:%S'))
+    gui_item.setArt({
+        'thumb': item.get_art('thumbnail'),
+        'fanart': item.get_art('cover'),
+    })
+    return gui_item
+
+
+def list_feed_items(items: t.Iterable[Item]) -> t.Iterator[t.Tuple[str, xbmcgui.ListItem, bool]]:
+    """Выводит видео, сохраненные фоновым обновлением отслеживаемого источника."""
+    for i in items:
+        gui_item = create_list_item(i)
+        gui_item.setProperty('IsPlayable', 'true')
+        yield url_construct(i.item_type, i), gui_item, False
+
+
+def create_saved_item(addon: Addon, item: ItemRow) -> t.Tuple[str, xbmcgui.ListItem, bool]:
+    """Возвращает сохраненный элемент с контекстным меню для его изменения; у папки указано число вложенных элементов."""
+    url = url_construct(item.item_type, item)
+
+    gui_item = create_list_item(item)
+
+    if item.item_type == ItemType.FOLDER:
+        gui_item.setLabel(f'{item.title} ({item.folder_size})')
+
+    context_menu = [
+        (
+            addon.localize('Rename'),
+            'RunPlugin(%s)' % addon.url_for(rename_item, item_id=item.id),
+        ),
+        (
+            addon.localize('Move to folder'),
+            'RunPlugin(%s)' % addon.url_for(move_item, item_id=item.id),
+        ),
+        (
+            addon.localize('Copy to folder'),
+            'RunPlugin(%s)' % addon.url_for(move_item, item_id=item.id, copy=True),
+        ),
+        (
+            addon.localize('Delete'),
+            'RunPlugin(%s)' % addon.url_for(delete_item, item_id=item.id),
+        ),
+    ]
+
+    if not item.is_folder:
+        gui_item.setProperty('IsPlayable', 'true')
+
+    if item.item_type == ItemType.FOLDER:
+        context_menu.insert(0, (
+            addon.localize('Add item'),
+            'RunPlugin(%s)' % addon.url_for(create_item, parent_id=item.id),
+        ))
+
+    gui_item.addContextMenuItems(context_menu)
+
+    return url, gui_item, item.is_folder
+
+
+def list_saved_items(addon: Addon, items: t.Iterable[ItemRow]) -> t.Iterator[t.Tuple[str, xbmcgui.ListItem, bool]]:
+    """Выводит сохраненные элементы с контекстным меню для их изменения."""
+    for i in items:
+        yield create_saved_item(addon, i)
+
+
 @router.route
 def play_video(addon: Addon, url: t.Annotated[str, Scope.QUERY]) -> None:
     open_browser(url)
@@ -46,14 +130,25 @@ def list_items(
     addon: Addon,
     items_per_page: t.Annotated[int, Scope.SETTINGS],
     offset: t.Annotated[int, Scope.QUERY] = 0,
+    after: t.Annotated[t.Optional[str], Scope.QUERY] = None,
     folder_id: t.Annotated[t.Optional[int], Scope.QUERY] = None,
 ):
-    if folder_id is None and offset < 1:
+    if folder_id is None and after is None and offset < 1:
         tv_channels_url = addon.url_for('resources.lib.pages.rutube.list_tv_channels')
         tv_channels_item = xbmcgui.ListItem('[B][COLOR lightgreen]%s[/COLOR][/B]' % addon.localize('Channels'))
         tv_channels_item.setArt({'thumb': addon.get_path('resources/lib/assets/icons/live_tv.png')})
         yield tv_channels_url, tv_channels_item, True
 
+        search_item = xbmcgui.ListItem('[B]%s[/B]' % addon.localize('Search'))
+        search_item.setArt({'thumb': 'DefaultAddonsSearch.png'})
+        yield addon.url_for(search_items), search_item, True
+
+        if addon.get_setting('feed.enabled', bool):
+            feed_item = xbmcgui.ListItem('[B][COLOR yellow]%s[/COLOR][/B]' % addon.localize('New videos'))
+            feed_item.setArt({'thumb': addon.get_path('resources/lib/assets/icons/web_stories.png')})
+            feed_item.setInfo('video', {'plot': addon.localize('Latest videos from followed channels and playlists.')})
+            yield addon.url_for(list_feed), feed_item, True
+
         if addon.get_setting('boosty.enabled', bool):
             boosty_url = addon.url_for('resources.lib.pages.boosty.list_subscriptions')
             boosty_item = xbmcgui.ListItem('[B][COLOR orange]%s[/COLOR][/B]' % addon.localize('Boosty'))
@@ -67,51 +162,54 @@ def list_items(
     create_action.setProperty('IsPlayable', 'false')
     yield addon.url_for(create_item, parent_id=folder_id), create_action, False
 
-    items = Item.select(parent_id=folder_id, limit=items_per_page + 1, offset=offset)
-    render_next_page = len(items) > items_per_page
-
-    for i in items[:items_per_page]:
-        url = url_construct(i.item_type, i)
-
-        gui_item = xbmcgui.ListItem(label=i.title)
-        info_tag = gui_item.getVideoInfoTag()
-        info_tag.setPlot('\n\n'.join((
-            f'[B]{addon.localize(i.provider)}[/B]' if i.item_type != ItemType.FOLDER else '',
-            i.description,
-        )))
-        info_tag.setDuration(i.data.get('duration', 0))
-        info_tag.setFirstAired(i.data.get('published', i.ts).strftime('%Y-%m-%d %H:%M:%S'))
-        gui_item.setArt({
-            'thumb': i.thumbnail,
-            'fanart': i.cover,
-        })
-        context_menu = [
-            (
-                addon.localize('Rename'),
-                'RunPlugin(%s)' % addon.url_for(rename_item, item_id=i.id),
-            ),
-            (
-                addon.localize('Delete'),
-                'RunPlugin(%s)' % addon.url_for(delete_item, item_id=i.id),
-            ),
-        ]
-
-        if not i.is_folder:
-            gui_item.setProperty('IsPlayable', 'true')
-
-        if i.item_type == ItemType.FOLDER:
-            context_menu.insert(0, (
-                addon.localize('Add item'),
-                'RunPlugin(%s)' % addon.url_for(create_item, parent_id=i.id),
-            ))
-
-        gui_item.addContextMenuItems(context_menu)
-
-        yield url, gui_item, i.is_folder
-
-    if render_next_page:
-        offset += items_per_page
-        yield create_next_element(list_items, folder_id=folder_id, offset=offset)
+    # Строки выводятся по мере чтения курсора, лишняя строка только показывает, что есть следующая страница.
+    rows = Item.iter_select(parent_id=folder_id, limit=items_per_page + 1, offset=offset, after=after)
+    last_row = None
+
+    for last_row in itertools.islice(rows, items_per_page):
+        yield create_saved_item(addon, last_row)
+
+    if last_row is not None and next(rows, None) is not None:
+        yield create_next_element(list_items, folder_id=folder_id, after=last_row.page_token)
+
+
+@router.route
+@Directory(ltitle='New videos', content=Content.VIDEOS)
+def list_feed(
+    addon: Addon,
+    items_per_page: t.Annotated[int, Scope.SETTINGS],
+    after: t.Annotated[t.Optional[str], Scope.QUERY] = None,
+):
+    page = select_latest(limit=items_per_page, after=after)
+
+    yield from list_feed_items(page.items)
+
+    if page.next_page:
+        yield create_next_element(list_feed, after=page.next_page)
+
+
+@router.route
+@Directory(ltitle='Search', content=Content.VIDEOS)
+def search_items(
+    addon: Addon,
+    items_per_page: t.Annotated[int, Scope.SETTINGS],
+    query: t.Annotated[t.Optional[str], Scope.QUERY] = None,
+    offset: t.Annotated[int, Scope.QUERY] = 0,
+):
+    if query is None:
+        text = prompt(addon.localize('Enter search query'), required=True)
+
+        if not text:
+            return None
+
+        query = text.value
+
+    items = Item.search(query, limit=items_per_page + 1, offset=offset)
+
+    yield from list_saved_items(addon, items[:items_per_page])
+
+    if len(items) > items_per_page:
+        yield create_next_element(search_items, query=query, offset=offset + items_per_page)
 
 
 @router.route
@@ -145,6 +243,30 @@ def delete_item(
             xbmc.executebuiltin('Container.Refresh()')
 
 
+@router.route
+def move_item(
+    item_id: t.Annotated[int, Scope.QUERY],
+    copy: t.Annotated[bool, Scope.QUERY] = False,
+):
+    # При копировании папку можно вложить в нее саму, при переносе - нет.
+    folders = [(None, current_addon.localize('Home'))]
+    folders.extend(Item.get_folder_paths(exclude_id=None if copy else item_id))
+
+    index = xbmcgui.Dialog().select(current_addon.localize('Select folder'), [path for _, path in folders])
+
+    if index < 0:
+        return None
+
+    try:
+        if copy:
+            Item.copy_many([item_id], folders[index][0])
+        else:
+            Item.move_many([item_id], folders[index][0])
+        xbmc.executebuiltin('Container.Refresh()')
+    except ValueError as err:
+        alert(current_addon.localize('Error'), str(err))
+
+
 @router.route
 def rename_item(
     item_id: t.Annotated[str, Scope.QUERY],
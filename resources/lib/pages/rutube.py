@@ -14,27 +14,29 @@ import xbmcplugin
 from yt_dlp_utils import YTDownloader
 
 from .items import url_construct
+from ..aio import async_client, Call
+from ..feed import get_first_page
 from ..storage import Item, ItemType
 from ..providers.rutube import rutube_session
-from ..utils import get_icon
+from ..utils import get_icon, log_elapsed
 
 
 @url_construct.register(ItemType.RUTUBE_CHANNEL)
 def get_url_for_channel(item: Item) -> str:
     """Возвращает ссылку для отображения меню Rutube канала."""
-    return current_addon.url_for(channel, channel_id=item.data['channel_id'], title=item.title)
+    return current_addon.url_for(channel, channel_id=item.get_data('channel_id'), title=item.title, source_id=item.id)
 
 
 @url_construct.register(ItemType.RUTUBE_PLAYLIST)
 def get_url_for_playlist(item: Item) -> str:
     """Возвращает ссылку для отображения списка видео в плейлисте Rutube."""
-    return current_addon.url_for(list_playlist_items, playlist_id=item.data['playlist_id'])
+    return current_addon.url_for(list_playlist_items, playlist_id=item.get_data('playlist_id'), source_id=item.id)
 
 
 @url_construct.register(ItemType.RUTUBE_VIDEO)
 def get_url_for_video(item: Item) -> str:
     """Возвращает ссылку для отображения видео."""
-    return current_addon.url_for(play_video, video_id=item.data['video_id'])
+    return current_addon.url_for(play_video, video_id=item.get_data('video_id'))
 
 
 @router.route
@@ -53,31 +55,102 @@ def download_video(
     )
 
 
+def create_video_item(
+    video_id: str,
+    title: str,
+    description: str,
+    duration: int,
+    category: str,
+    published: datetime,
+    thumbnail: str,
+    author: str,
+    page_url: str,
+) -> t.Tuple[str, xbmcgui.ListItem, bool]:
+    """Возвращает элемент списка с видео Rutube и пунктом контекстного меню для его загрузки."""
+    url = current_addon.url_for(play_video, video_id=video_id)
+    item = xbmcgui.ListItem(title)
+    info_tag = item.getVideoInfoTag()
+    info_tag.setPlot(description)
+    info_tag.setDuration(duration)
+    info_tag.setGenres([category] if category else [])
+    info_tag.setFirstAired(published.strftime('%Y-%m-%d %H:%M:%S'))
+    item.setArt({
+        'thumb': thumbnail,
+        'fanart': thumbnail,
+    })
+    item.setProperty('IsPlayable', 'true')
+    item.addContextMenuItems([
+        (
+            current_addon.localize('download'),
+            'RunPlugin(%s)' % current_addon.url_for(
+                download_video,
+                author=author,
+                page_url=page_url,
+            ),
+        ),
+    ])
+    return url, item, False
+
+
 def list_videos(iterable):
     for v in iterable:
-        url = current_addon.url_for(play_video, video_id=v['id'])
-        item = xbmcgui.ListItem(v['title'])
-        info_tag = item.getVideoInfoTag()
-        info_tag.setPlot(v['description'])
-        info_tag.setDuration(v['duration'])
-        info_tag.setGenres([v['category']['name']])
-        info_tag.setFirstAired(datetime.fromisoformat(v['created_ts']).strftime('%Y-%m-%d %H:%M:%S'))
-        item.setArt({
-            'thumb': v['thumbnail_url'],
-            'fanart': v['thumbnail_url'],
-        })
-        item.setProperty('IsPlayable', 'true')
-        item.addContextMenuItems([
-            (
-                current_addon.localize('download'),
-                'RunPlugin(%s)' % current_addon.url_for(
-                    download_video,
-                    author=v['author']['name'],
-                    page_url=v['video_url'],
-                ),
-            ),
-        ])
-        yield url, item, False
+        yield create_video_item(
+            video_id=v['id'],
+            title=v['title'],
+            description=v['description'],
+            duration=v['duration'],
+            category=v['category']['name'],
+            published=datetime.fromisoformat(v['created_ts']),
+            thumbnail=v['thumbnail_url'],
+            author=v['author']['name'],
+            page_url=v['video_url'],
+        )
+
+
+def list_saved_videos(items: t.Iterable[Item], author: str = ''):
+    """Выводит видео, сохраненные фоновым обновлением, так же, как полученные из API."""
+    for i in items:
+        yield create_video_item(
+            video_id=i.get_data('video_id'),
+            title=i.title,
+            description=i.description,
+            duration=i.get_data('duration', 0),
+            category=i.data.get('category', ''),
+            published=i.ts,
+            thumbnail=i.thumbnail,
+            author=i.data.get('author', author),
+            page_url=i.url,
+        )
+
+
+def get_channel_videos(channel_id: str, limit: int, page: int):
+    """
+    Возвращает страницу видео канала.
+
+    Вместе с первой страницей параллельно запрашиваются плейлисты канала: ответ попадает в кэш,
+    и список плейлистов откроется без запроса к API.
+    """
+    if page > 1:
+        return rutube_session.get_videos(person_id=channel_id, limit=limit, page=page)
+
+    videos, playlists = async_client.run(
+        Call(rutube_session.HOST, rutube_session.get_videos, kwargs={
+            'person_id': channel_id, 'limit': limit, 'page': page,
+        }),
+        Call(rutube_session.HOST, rutube_session.get_playlists, kwargs={
+            'person_id': channel_id, 'limit': limit, 'page': 1,
+        }),
+        return_exceptions=True,
+    )
+
+    if isinstance(videos, BaseException):
+        raise videos
+
+    # Плейлисты запрашиваются заранее, их ошибка не должна мешать показу видео канала.
+    if isinstance(playlists, BaseException):
+        current_addon.logger.error(f'Failed to prefetch playlists of channel {channel_id!r}: {playlists}')
+
+    return videos
 
 
 @router.route
@@ -88,6 +161,7 @@ def channel(
     items_per_page: t.Annotated[int, Scope.SETTINGS],
     page: t.Annotated[int, Scope.QUERY] = 1,
     title: t.Annotated[str, Scope.QUERY] = '',
+    source_id: t.Annotated[t.Optional[int], Scope.QUERY] = None,
 ):
     if page < 2:
         playlists_title = addon.localize('Playlists')
@@ -102,13 +176,20 @@ def channel(
         shorts_item.setArt({'icon': get_icon('web_stories.png')})
         yield shorts_url, shorts_item, True
 
-    user_videos = rutube_session.get_videos(person_id=channel_id, limit=items_per_page, page=page)
+    saved_page = get_first_page(source_id, items_per_page) if source_id and page < 2 else None
 
-    yield from list_videos(user_videos)
+    if saved_page is not None:
+        # Первая страница уже обновлена сервисом в фоне и выводится из базы данных без запросов к API.
+        yield from list_saved_videos(saved_page.items, author=title)
+        next_page = int(saved_page.next_page) if saved_page.next_page else None
+    else:
+        user_videos = get_channel_videos(channel_id, items_per_page, page)
+        yield from list_videos(user_videos)
+        next_page = user_videos.next_page
 
-    if user_videos.next_page:
+    if next_page:
         yield create_next_item(
-            addon.url_for(channel, channel_id=channel_id, page=user_videos.next_page, title=title)
+            addon.url_for(channel, channel_id=channel_id, page=next_page, title=title)
         )
 
 
@@ -163,14 +244,21 @@ def list_playlist_items(
     items_per_page: t.Annotated[int, Scope.SETTINGS],
     page: t.Annotated[int, Scope.QUERY] = 1,
     title: t.Annotated[str, Scope.QUERY] = '',
+    source_id: t.Annotated[t.Optional[int], Scope.QUERY] = None,
 ):
-    user_videos = rutube_session.get_playlist_items(playlist_id=playlist_id, limit=items_per_page, page=page)
+    saved_page = get_first_page(source_id, items_per_page) if source_id and page < 2 else None
 
-    yield from list_videos(user_videos)
+    if saved_page is not None:
+        yield from list_saved_videos(saved_page.items)
+        next_page = int(saved_page.next_page) if saved_page.next_page else None
+    else:
+        user_videos = rutube_session.get_playlist_items(playlist_id=playlist_id, limit=items_per_page, page=page)
+        yield from list_videos(user_videos)
+        next_page = user_videos.next_page
 
-    if user_videos.next_page:
+    if next_page:
         yield create_next_item(
-            addon.url_for(list_playlist_items, playlist_id=playlist_id, page=user_videos.next_page, title=title)
+            addon.url_for(list_playlist_items, playlist_id=playlist_id, page=next_page, title=title)
         )
 
 
@@ -199,14 +287,15 @@ def play_video(
     # quality: t.Annotated[str, Scope.QUERY],
     video_id: t.Annotated[str, Scope.QUERY],
 ):
-    video = rutube_session.get_video_by_id(video_id)
+    with log_elapsed(f'Rutube video {video_id}: time to setResolvedUrl {{ms:.0f}} ms'):
+        stream_url = rutube_session.get_stream_url(video_id)
 
-    if video.best_quality_url is None:
-        raise ValueError('Stream not found')
+        if stream_url is None:
+            raise ValueError('Stream not found')
 
-    item = xbmcgui.ListItem(offscreen=True)
-    item.setPath(video.best_quality_url)
-    item.setProperty('inputstream', 'inputstream.adaptive')
-    item.setProperty('inputstream.adaptive.manifest_type', 'hls')
+        item = xbmcgui.ListItem(offscreen=True)
+        item.setPath(stream_url)
+        item.setProperty('inputstream', 'inputstream.adaptive')
+        item.setProperty('inputstream.adaptive.manifest_type', 'hls')
 
-    xbmcplugin.setResolvedUrl(addon.handle, True, item)
+        xbmcplugin.setResolvedUrl(addon.handle, True, item)
@@ -1,3 +1,4 @@
+from datetime import datetime
 from functools import wraps
 import typing as t
 
@@ -15,6 +16,8 @@ import xbmcgui
 import xbmcplugin
 
 from .items import url_construct
+from ..aio import async_client, Call
+from ..feed import get_first_page
 from ..providers.youtube import youtube_session, YouTubeApiError
 from ..storage import Item, ItemType
 from ..utils import get_icon
@@ -37,39 +40,77 @@ def get_url_for_channel(item: Item) -> str:
     """Возвращает ссылку для отображения меню YouTube канала."""
     return current_addon.url_for(
         list_channel,
-        channel_id=item.data['channel_id'],
-        upload_playlist_id=item.data['upload_playlist_id'],
+        channel_id=item.get_data('channel_id'),
+        upload_playlist_id=item.get_data('upload_playlist_id'),
         title=item.title,
+        source_id=item.id,
     )
 
 
 @url_construct.register(ItemType.YOUTUBE_PLAYLIST)
 def get_url_for_playlist(item: Item) -> str:
     """Возвращает ссылку для отображения списка видео в плейлисте YouTube."""
-    return current_addon.url_for(list_playlist_items, playlist_id=item.data['playlist_id'], title=item.title)
+    return current_addon.url_for(
+        list_playlist_items, playlist_id=item.get_data('playlist_id'), title=item.title, source_id=item.id,
+    )
 
 
 @url_construct.register(ItemType.YOUTUBE_VIDEO)
 def get_url_for_video(item: Item) -> str:
     """Возвращает ссылку для отображения видео."""
-    return current_addon.url_for(play_video, video_id=item.data['video_id'])
+    return current_addon.url_for(play_video, video_id=item.get_data('video_id'))
+
+
+def create_video_item(
+    video_id: str,
+    title: str,
+    description: str,
+    duration: int,
+    published: datetime,
+    thumbnail: str,
+    cover: str,
+) -> t.Tuple[str, xbmcgui.ListItem, bool]:
+    """Возвращает элемент списка с видео YouTube."""
+    url = current_addon.url_for(play_video, video_id=video_id)
+    item = xbmcgui.ListItem(title)
+    item.setInfo('video', {
+        'plot': description,
+        'duration': duration,
+        'aired': published.strftime('%Y-%m-%d %H:%M:%S'),
+    })
+    item.setArt({
+        'thumb': thumbnail,
+        'fanart': cover,
+    })
+    item.setProperty('IsPlayable', 'true')
+    return url, item, False
 
 
 def list_videos(iterable):
     for v in iterable:
-        url = current_addon.url_for(play_video, video_id=v['id'])
-        item = xbmcgui.ListItem(v.title)
-        item.setInfo('video', {
-            'plot': v.description,
-            'duration': v.duration,
-            'aired': v.published.strftime('%Y-%m-%d %H:%M:%S'),
-        })
-        item.setArt({
-            'thumb': v.thumbnail,
-            'fanart': v.cover,
-        })
-        item.setProperty('IsPlayable', 'true')
-        yield url, item, False
+        yield create_video_item(
+            video_id=v['id'],
+            title=v.title,
+            description=v.description,
+            duration=v.duration,
+            published=v.published,
+            thumbnail=v.thumbnail,
+            cover=v.cover,
+        )
+
+
+def list_saved_videos(items: t.Iterable[Item]):
+    """Выводит видео, сохраненные фоновым обновлением, так же, как полученные из API."""
+    for i in items:
+        yield create_video_item(
+            video_id=i.get_data('video_id'),
+            title=i.title,
+            description=i.description,
+            duration=i.get_data('duration', 0),
+            published=i.ts,
+            thumbnail=i.thumbnail,
+            cover=i.cover,
+        )
 
 
 @router.route
@@ -82,22 +123,68 @@ def list_channel(
     items_per_page: t.Annotated[int, Scope.SETTINGS],
     next_page: t.Annotated[str, Scope.QUERY] = '',
     title: t.Annotated[str, Scope.QUERY] = '',
+    source_id: t.Annotated[t.Optional[int], Scope.QUERY] = None,
 ):
-    if not next_page:
+    saved_page = get_first_page(source_id, items_per_page) if source_id and not next_page else None
+
+    if saved_page is not None:
+        # Первая страница уже обновлена сервисом в фоне и выводится из базы данных без запросов к API.
         item_title = addon.localize('Playlists')
         playlists_url = addon.url_for(list_playlists, channel_id=channel_id, title=f'{title} - {item_title}')
         playlists_item = xbmcgui.ListItem(item_title)
         playlists_item.setArt({'icon': get_icon('order_play.png')})
         yield playlists_url, playlists_item, True
 
+        yield from list_saved_videos(saved_page.items)
+
+        if saved_page.next_page:
+            yield create_next_item(
+                addon.url_for(
+                    list_channel,
+                    channel_id=channel_id,
+                    upload_playlist_id=upload_playlist_id,
+                    items_per_page=items_per_page,
+                    next_page=saved_page.next_page,
+                    title=title,
+                )
+            )
+            youtube_session.prefetch_videos(upload_playlist_id, saved_page.next_page, limit=items_per_page)
+        return None
+
+    if not next_page:
+        # Первая страница загрузок и плейлисты канала запрашиваются параллельно,
+        # список плейлистов попадает в кэш и откроется без запроса к API.
+        videos, playlists = async_client.run(
+            Call(youtube_session.HOST, youtube_session.get_videos, kwargs={
+                'playlist_id': upload_playlist_id, 'limit': items_per_page,
+            }),
+            Call(youtube_session.HOST, youtube_session.get_playlists, (channel_id,), {
+                'limit': items_per_page,
+            }),
+            return_exceptions=True,
+        )
+
+        if isinstance(videos, BaseException):
+            raise videos
+
+        # Плейлисты запрашиваются заранее, их ошибка не должна мешать показу видео канала.
+        if isinstance(playlists, BaseException):
+            current_addon.logger.error(f'Failed to load playlists of channel {channel_id!r}: {playlists}')
+        else:
+            item_title = addon.localize('Playlists')
+            playlists_url = addon.url_for(list_playlists, channel_id=channel_id, title=f'{title} - {item_title}')
+            playlists_item = xbmcgui.ListItem(f'{item_title} ({playlists.total})')
+            playlists_item.setArt({'icon': get_icon('order_play.png')})
+            yield playlists_url, playlists_item, True
+    else:
+        videos = youtube_session.get_videos(
+            playlist_id=upload_playlist_id, limit=items_per_page, page_token=next_page,
+        )
+
     #     shorts_url = addon.url_for(list_shorts, channel_id=channel_id)
     #     shorts_item = xbmcgui.ListItem(addon.localize('Shorts'))
     #     yield shorts_url, shorts_item, True
 
-    videos = youtube_session.get_videos(
-        playlist_id=upload_playlist_id, limit=items_per_page, page_token=next_page,
-    )
-
     yield from list_videos(videos)
 
     if videos.next_page:
@@ -111,6 +198,7 @@ def list_channel(
                 title=title,
             )
         )
+        youtube_session.prefetch_videos(upload_playlist_id, videos.next_page, limit=items_per_page)
 
 
 @router.route
@@ -151,7 +239,26 @@ def list_playlist_items(
     items_per_page: t.Annotated[int, Scope.SETTINGS],
     next_page: t.Annotated[str, Scope.QUERY] = '',
     title: t.Annotated[str, Scope.QUERY] = '',
+    source_id: t.Annotated[t.Optional[int], Scope.QUERY] = None,
 ):
+    saved_page = get_first_page(source_id, items_per_page) if source_id and not next_page else None
+
+    if saved_page is not None:
+        yield from list_saved_videos(saved_page.items)
+
+        if saved_page.next_page:
+            yield create_next_item(
+                addon.url_for(
+                    list_playlist_items,
+                    playlist_id=playlist_id,
+                    items_per_page=items_per_page,
+                    next_page=saved_page.next_page,
+                    title=title,
+                )
+            )
+            youtube_session.prefetch_videos(playlist_id, saved_page.next_page, limit=items_per_page)
+        return None
+
     videos = youtube_session.get_videos(
         playlist_id=playlist_id, limit=items_per_page, page_token=next_page,
     )
@@ -168,6 +275,7 @@ def list_playlist_items(
                 title=title,
             )
         )
+        youtube_session.prefetch_videos(playlist_id, videos.next_page, limit=items_per_page)
 
 
 @router.route
@@ -1,8 +1,16 @@
+import codecs
 from datetime import timedelta
+from html.parser import HTMLParser
+import itertools
+import re
+import threading
 import typing as t
 
 from kodi_useful.http.client import Session
 
+if t.TYPE_CHECKING:
+    from requests import Response
+
 
 class MetaTagsCollection(tuple):
     def find(self, *keys, default=''):
@@ -12,12 +20,74 @@ class MetaTagsCollection(tuple):
         return default
 
 
+class LazyMetaTags:
+    """Мета теги страницы, которые загружаются только при первом обращении к ним."""
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self._tags: t.Optional[MetaTagsCollection] = None
+
+    def find(self, *keys, default=''):
+        if self._tags is None:
+            self._tags = parse_ogg_tags(self.url)
+        return self._tags.find(*keys, default=default)
+
+
+class HeadParser(HTMLParser):
+    """Потоковый парсер, который собирает мета теги и заголовок страницы до конца секции head."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.tags: t.List[t.Tuple[str, t.Optional[str]]] = []
+        self.description: t.Optional[str] = None
+        self.is_finished = False
+        self._title: t.Optional[t.List[str]] = None
+        self._in_title = False
+
+    @property
+    def title(self) -> t.Optional[str]:
+        return None if self._title is None else ''.join(self._title).strip()
+
+    def handle_starttag(self, tag: str, attrs: t.List[t.Tuple[str, t.Optional[str]]]) -> None:
+        if self.is_finished:
+            return None
+
+        if tag == 'meta':
+            attrs = dict(attrs)
+
+            if attrs.get('property'):
+                self.tags.append((attrs['property'], attrs.get('content')))
+            elif attrs.get('name') == 'description' and self.description is None:
+                self.description = attrs.get('content')
+        elif tag == 'title' and self._title is None:
+            self._title = []
+            self._in_title = True
+        elif tag == 'body':
+            self.is_finished = True
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == 'title':
+            self._in_title = False
+        elif tag == 'head':
+            self.is_finished = True
+
+    def handle_data(self, data: str) -> None:
+        if self._in_title:
+            self._title.append(data)
+
+
 def make_session(
     base_url: t.Optional[str] = None,
     cache: t.Optional[t.Dict[str, t.Any]] = None,
     headers: t.Optional[t.Dict[str, t.Any]] = None,
     params: t.Optional[t.Dict[str, t.Any]] = None,
 ) -> Session:
+    """
+    Создает HTTP сессию с кэшированием ответов.
+
+    Соединения с одним хостом хранятся в пуле и переиспользуются (keep-alive),
+    поэтому сессию выгодно создавать один раз и использовать повторно.
+    """
     cache = cache or {}
     cache.setdefault('expire_after', timedelta(minutes=30))
 
@@ -29,20 +99,159 @@ def make_session(
     )
 
 
-def parse_ogg_tags(url: str) -> MetaTagsCollection:
-    root_elem = make_session().parse_html(url, allow_redirects=True)
-    tags = [
-        (elem.get('property'), elem.get('content'))
-        for elem in root_elem.iterfind('.//head/meta')
-        if elem.get('property')
-    ]
+# Флаг отключения кэша общий для всех потоков, работающих с сессией, поэтому запросы без кэша
+# отправляются по очереди, иначе другой поток может включить кэш посреди запроса.
+_cache_disabled_lock = threading.Lock()
+
+
+def stream_uncached(session: Session, url: str) -> 'Response':
+    """
+    Выполняет GET запрос для чтения тела ответа по частям в обход кэша сессии.
+
+    Кэширующая сессия читает ответ целиком, чтобы сохранить его, и досрочное прекращение чтения
+    тогда ничего не экономит. Блокировка удерживается только до получения заголовков ответа.
+    """
+    with _cache_disabled_lock, session.cache_disabled():
+        return session.get(url, stream=True, allow_redirects=True)
+
+
+def scan_url(
+    session: Session,
+    url: str,
+    pattern: str,
+    chunk_size: int = 16 * 1024,
+    overlap: int = 1024,
+) -> t.Optional[str]:
+    """
+    Ищет в теле ответа первое совпадение с pattern и возвращает его первую группу.
+
+    Ответ читается по частям, соединение закрывается сразу после нахождения совпадения.
+    Совпадение не должно быть длиннее overlap байт, чтобы найтись на границе частей.
+    """
+    regex = re.compile(pattern.encode('utf-8'))
+    response = stream_uncached(session, url)
+
+    try:
+        response.raise_for_status()
+        tail = b''
+        match = None
+
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            buffer = tail + chunk
+            match = regex.search(buffer)
+
+            # Совпадение у самого конца буфера может продолжиться в следующей части.
+            if match and match.end() < len(buffer):
+                return match.group(1).decode('utf-8')
+
+            tail = buffer[-overlap:]
+
+        if match:
+            return match.group(1).decode('utf-8')
+    finally:
+        response.close()
+
+    return None
+
+
+def parse_url_list(text: str) -> t.Tuple[t.List[str], t.List[str]]:
+    """
+    Возвращает ссылки из текста, по одной на строку, и отклоненные строки; поддерживает формат M3U.
+
+    Принимаются только абсолютные ссылки http(s): относительные пути из M3U и прочий текст
+    попадают в отклоненные строки, а не превращаются в папки с таким названием.
+    """
+    urls = []
+    rejected = []
+
+    for line in text.splitlines():
+        line = line.strip()
+
+        if not line or line.startswith('#') or line in urls or line in rejected:
+            continue
+
+        if line.startswith(('http://', 'https://')):
+            urls.append(line)
+        else:
+            rejected.append(line)
+
+    return urls, rejected
+
+
+# Сколько байт от начала страницы просматривать в поисках <meta charset>, как это делают браузеры.
+CHARSET_SNIFF_SIZE = 1024
+
+_header_charset_re = re.compile(r';\s*charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+_meta_charset_re = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+
+
+def detect_encoding(content_type: str, head: bytes) -> str:
+    """
+    Возвращает кодировку HTML страницы.
+
+    Кодировка из заголовка Content-Type используется, только если она указана явно,
+    иначе ищется объявление в мета теге в начале страницы, а по умолчанию - utf-8.
+    """
+    for match in (_header_charset_re.search(content_type), _meta_charset_re.search(head[:CHARSET_SNIFF_SIZE])):
+        if match is None:
+            continue
+
+        charset = match.group(1)
+        charset = charset if isinstance(charset, str) else charset.decode('ascii')
+
+        try:
+            return codecs.lookup(charset).name
+        except LookupError:
+            continue
+
+    return 'utf-8'
+
+
+def parse_ogg_tags(url: str, chunk_size: int = 16 * 1024, max_size: int = 2 * 1024 * 1024) -> MetaTagsCollection:
+    """
+    Возвращает мета теги страницы.
+
+    Страница читается по частям в обход кэша только до конца секции head (но не больше max_size байт),
+    после чего соединение закрывается.
+    """
+    response = stream_uncached(make_session(), url)
+
+    try:
+        response.raise_for_status()
+
+        parser = HeadParser()
+        chunks = response.iter_content(chunk_size=chunk_size)
+        head = b''
+
+        # requests для text/html без charset сообщает ISO-8859-1, поэтому кодировка определяется
+        # по заголовку и началу страницы до разбора.
+        for chunk in chunks:
+            head += chunk
+
+            if len(head) >= CHARSET_SNIFF_SIZE:
+                break
+
+        encoding = detect_encoding(response.headers.get('Content-Type', ''), head)
+        decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        received = 0
+
+        for chunk in itertools.chain([head], chunks):
+            received += len(chunk)
+            parser.feed(decoder.decode(chunk))
+
+            if parser.is_finished or received >= max_size:
+                break
+        else:
+            parser.feed(decoder.decode(b'', final=True))
+    finally:
+        response.close()
+
+    tags = list(parser.tags)
 
-    title_elem = root_elem.find('.//title')
-    if title_elem is not None:
-        tags.append(('title', title_elem.text))
+    if parser.title is not None:
+        tags.append(('title', parser.title))
 
-    meta_description_elem = root_elem.find('.//meta[@name="description"]')
-    if meta_description_elem is not None:
-        tags.append(('description', meta_description_elem.get('content')))
+    if parser.description is not None:
+        tags.append(('description', parser.description))
 
     return MetaTagsCollection(tags)
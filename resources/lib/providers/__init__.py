@@ -1,12 +1,10 @@
 from .base import MediaProvider
-from .boosty import adapter as boosty_adapter
-# from .ctc import adapter as ctc_adapter
-from .rutube import adapter as rutube_adapter
-from .youtube import adapter as youtube_adapter
 
 
 media_provider = MediaProvider()
-media_provider.register_adapter(boosty_adapter)
-# media_provider.register_adapter(ctc_adapter)
-media_provider.register_adapter(rutube_adapter)
-media_provider.register_adapter(youtube_adapter)
+media_provider.register_adapter(f'{__name__}.boosty:adapter', hosts=['boosty.to'])
+# media_provider.register_adapter(f'{__name__}.ctc:adapter')
+media_provider.register_adapter(f'{__name__}.rutube:adapter', hosts=['rutube.ru'])
+media_provider.register_adapter(
+    f'{__name__}.youtube:adapter', hosts=['www.youtube.com', 'youtube.com', 'youtu.be'],
+)
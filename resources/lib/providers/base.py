@@ -1,12 +1,37 @@
 import typing as t
+from urllib.parse import urlparse
 
-from ..parsers import parse_ogg_tags
+from ..artwork import artwork_cache
+from ..parsers import LazyMetaTags
 from ..storage import Item, ItemType
+from ..utils import import_string
+
+
+Adapter = t.Callable[[str], t.Optional[t.Dict[str, t.Any]]]
+
+
+class LazyAdapter:
+    """Адаптер, модуль которого импортируется только при первом вызове."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._adapter: t.Optional[Adapter] = None
+
+    def __call__(self, url: str) -> t.Optional[t.Dict[str, t.Any]]:
+        if self._adapter is None:
+            self._adapter = import_string(self.path)
+        return self._adapter(url)
 
 
 class MediaProvider:
     def __init__(self):
-        self._adapters = []
+        self._adapters: t.List[Adapter] = []
+        self._host_index: t.Dict[str, t.List[Adapter]] = {}
+
+    def get_adapters(self, url: str) -> t.List[Adapter]:
+        """Возвращает адаптеры, которые могут обработать URL: сначала по хосту, затем универсальные."""
+        host = (urlparse(url).hostname or '').lower()
+        return self._host_index.get(host, []) + self._adapters
 
     def get_data(self, title_or_url: str) -> t.Dict[str, t.Any]:
         if not title_or_url.startswith('http://') and not title_or_url.startswith('https://'):
@@ -17,9 +42,10 @@ class MediaProvider:
             }
 
         url = title_or_url
-        meta = parse_ogg_tags(url)
+        # Страница загружается, только если адаптер не заполнил нужные поля или не нашелся вовсе.
+        meta = LazyMetaTags(url)
 
-        for adapter in self._adapters:
+        for adapter in self.get_adapters(url):
             data = adapter(url)
 
             if data is not None:
@@ -41,8 +67,38 @@ class MediaProvider:
 
     def create_item(self, title_or_url: str, parent_id: t.Optional[int] = None) -> Item:
         data = self.get_data(title_or_url)
+
+        # Обложки сохраняются локально, исходные ссылки остаются на случай вытеснения файлов из кэша.
+        artwork = {
+            name: data[name]
+            for name in ('thumbnail', 'cover')
+            if (data.get(name) or '').startswith(('http://', 'https://'))
+        }
+
+        if artwork:
+            local_paths = artwork_cache.fetch_many(artwork.values())
+            data.update({name: local_paths[url] for name, url in artwork.items()})
+            data['data'] = {**data.get('data', {}), 'artwork': artwork}
+
         return Item(parent_id=parent_id, **data)
 
-    def register_adapter(self, adapter):
-        self._adapters.append(adapter)
+    def register_adapter(self, adapter: t.Union[Adapter, str], hosts: t.Iterable[str] = ()) -> Adapter:
+        """
+        Регистрирует адаптер для получения данных по URL.
+
+        Адаптер с указанными хостами вызывается только для URL с этих хостов,
+        адаптер без хостов - для любого URL. Вместо функции можно передать путь к ней
+        вида 'package.module:name', тогда модуль будет импортирован при первом вызове.
+        """
+        if isinstance(adapter, str):
+            adapter = LazyAdapter(adapter)
+
+        hosts = [h.lower() for h in hosts]
+
+        if not hosts:
+            self._adapters.append(adapter)
+
+        for host in hosts:
+            self._host_index.setdefault(host, []).append(adapter)
+
         return adapter
@@ -13,7 +13,7 @@ import xbmcplugin
 from yt_dlp_utils import YTDownloader
 from yt_dlp_utils.enums import Quality as YTQuality
 
-from ..storage import ItemType
+from ..storage import Item, ItemType
 
 
 def adapter(url: str):
@@ -88,6 +88,44 @@ def adapter(url: str):
     }
 
 
+def fetch_feed(item: Item, limit: int) -> t.Tuple[t.List[t.Dict[str, t.Any]], str]:
+    """Возвращает первую страницу доступных видео из профиля для фонового обновления."""
+    username = item.data['username']
+    media_files = boosty_session.get_media(
+        username=username,
+        limit=limit,
+        media_type=boosty_api.MediaType.VIDEO,
+        only_allowed=current_addon.get_setting('boosty.only_allowed', bool),
+    )
+    entries = []
+
+    for media in media_files:
+        post = media['post']
+
+        # Закрытые посты нельзя воспроизвести без подписки, в ленте они не нужны.
+        if not post['hasAccess']:
+            continue
+
+        entries.append({
+            'video_id': f"{post['id']}:{media['id']}",
+            'item_type': ItemType.BOOSTY_VIDEO,
+            'title': '%s - %s' % (post['title'], post['user']['name']),
+            'description': post.teaser.description,
+            'url': f"https://boosty.to/{username}/posts/{post['id']}",
+            'thumbnail': media['preview'],
+            'cover': media['preview'],
+            'published': post.publish_time,
+            'data': {
+                'post_id': post['id'],
+                'username': username,
+                'media_id': media['id'],
+                'duration': media['duration'],
+            },
+        })
+
+    return entries, '' if media_files.is_last else str(media_files.offset)
+
+
 def select_file_url(player_urls: t.Sequence[t.Dict[str, t.Any]]) -> t.Optional[str]:
     files = boosty_api.utils.get_allowed_quality(player_urls, skip_dash=True, skip_hls=True)
 
@@ -7,19 +7,35 @@ https://rutube.ru/api/feeds/tnt/?format=api
 """
 
 from collections import UserDict
+from datetime import datetime, timedelta
 from functools import cached_property
 import math
+import time
 import typing as t
 from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
 
 from kodi_useful.utils import get_screen_resolution
 import m3u8
 
-from ..parsers import make_session
-from ..storage import ItemType
+from ..cache import metadata_cache
+from ..parsers import make_session, scan_url
+from ..storage import get_connection, Item, ItemType
 from ..utils import re_search
 
 
+# Время жизни ответов API в постоянном кэше по первому сегменту пути.
+# Параметры воспроизведения (play) содержат ссылки с ограниченным сроком действия и не кэшируются.
+RUTUBE_CACHE_TTL = {
+    'playlist': timedelta(hours=1),
+    'profile': timedelta(days=1),
+    'video': timedelta(minutes=15),
+}
+
+# Максимальное время жизни выбранного потока, если в ссылке не указан срок ее действия.
+RUTUBE_STREAM_TTL = timedelta(minutes=10)
+
+
 def adapter(url):
     if url.startswith('https://rutube.ru/video/'):
         video_id = re_search(r'/video/([^/]+)/', url)
@@ -54,6 +70,10 @@ def adapter(url):
 
     if url.startswith('https://rutube.ru/'):
         profile = rutube_session.get_user(get_channel_id(url))
+
+        if profile.get('site_url'):
+            remember_channel_alias(profile['site_url'], profile['id'])
+
         return {
             'item_type': ItemType.RUTUBE_CHANNEL,
             'is_folder': True,
@@ -67,20 +87,91 @@ def adapter(url):
         }
 
 
+def fetch_feed(item: Item, limit: int) -> t.Tuple[t.List[t.Dict[str, t.Any]], str]:
+    """Возвращает первую страницу видео канала или плейлиста для фонового обновления."""
+    if item.item_type == ItemType.RUTUBE_CHANNEL:
+        videos = rutube_session.get_videos(person_id=item.data['channel_id'], limit=limit)
+    else:
+        videos = rutube_session.get_playlist_items(playlist_id=item.data['playlist_id'], limit=limit)
+
+    entries = [
+        {
+            'video_id': v['id'],
+            'item_type': ItemType.RUTUBE_VIDEO,
+            'title': v['title'],
+            'description': v['description'],
+            'url': v['video_url'],
+            'thumbnail': v['thumbnail_url'],
+            'cover': v['thumbnail_url'],
+            'published': datetime.fromisoformat(v['created_ts']),
+            'data': {
+                'video_id': v['id'],
+                'duration': v['duration'],
+                'category': v['category']['name'],
+                'author': v['author']['name'],
+            },
+        }
+        for v in videos
+    ]
+
+    return entries, str(videos.next_page or '')
+
+
+def get_channel_alias(url: str) -> str:
+    """Возвращает короткое имя канала из URL адреса вида https://rutube.ru/u/name/."""
+    return urlparse(url).path.strip('/').lower()
+
+
+def remember_channel_alias(url: str, channel_id: int) -> None:
+    """Запоминает идентификатор канала для короткого имени из URL адреса."""
+    name = get_channel_alias(url)
+
+    if name and not name.startswith('channel/'):
+        conn = get_connection()
+        conn.execute(
+            'INSERT OR REPLACE INTO rutube_channel_alias (name, channel_id) VALUES (?, ?)',
+            (name, channel_id),
+        )
+        conn.commit()
+
+
 def get_channel_id(url: str) -> int:
     """Возвращает целочисленный идентификатор пользователя из URL адреса."""
-    channel_id = (
-        re_search(r'/channel/(\d+)', url)
-        or
-        re_search(r'"channel_id":.*?(\d+)', rutube_session.http.get(url).text)
-    )
+    channel_id = re_search(r'/channel/(\d+)', url)
+
+    if channel_id is not None:
+        return int(channel_id)
+
+    row = get_connection().execute(
+        'SELECT channel_id FROM rutube_channel_alias WHERE name = ?', (get_channel_alias(url),),
+    ).fetchone()
+
+    if row is not None:
+        return row[0]
+
+    channel_id = scan_url(rutube_session.http, url, r'"channel_id":[^\d\n]*?(\d+)')
 
     if channel_id is None:
         raise ValueError(f'{url!r} is not Rutube channel.')
 
+    remember_channel_alias(url, int(channel_id))
+
     return int(channel_id)
 
 
+def get_url_expiry(url: str) -> t.Optional[float]:
+    """Возвращает время (unix timestamp), до которого действительна подписанная ссылка, если оно указано."""
+    qs = parse_qs(urlparse(url).query)
+
+    for name in ('expire', 'expires', 'e'):
+        value = qs.get(name, [''])[0]
+
+        if value.isdigit():
+            return float(value)
+
+    return None
+
+
 def get_playlist_id(url: str) -> int:
     """Возвращает целочисленный идентификатор плейлиста из URL адреса."""
     playlist_id = re_search(r'/plst/(\d+)', url)
@@ -107,6 +198,8 @@ class Collection(SimpleNamespace):
 
 
 class RutubeApi:
+    HOST = 'rutube.ru'
+
     def __init__(self) -> None:
         self.http = make_session(
             base_url='https://rutube.ru/api/',
@@ -122,12 +215,28 @@ class RutubeApi:
             },
         )
 
+    def _get(self, path: str, params: t.Dict[str, t.Any]) -> t.Dict[str, t.Any]:
+        """Выполняет GET запрос к API, ответ сохраняется в постоянном кэше, если для него задано время жизни."""
+        kind = path.replace('https://rutube.ru/api/', '').strip('/').split('/')[0]
+        ttl = RUTUBE_CACHE_TTL.get(kind)
+
+        if ttl is None:
+            return self.http.get(path, params=params).json()
+
+        return metadata_cache.get_or_fetch(
+            'rutube',
+            kind,
+            metadata_cache.make_key(path, **params),
+            lambda: self.http.get(path, params=params).json(),
+            ttl,
+        )
+
     def _get_collection(self, path: str, page: int = 1, **kwargs) -> Collection:
-        response_data = self.http.get(path, params={'page': page, **kwargs}).json()
+        response_data = self._get(path, {'page': page, **kwargs})
         return Collection(**response_data)
 
-    def _get_resource(self, path: str, **kwargs) -> t.Dict[str, t.Any]:
-        return self.http.get(path, **kwargs).json()
+    def _get_resource(self, path: str, params: t.Optional[t.Dict[str, t.Any]] = None) -> t.Dict[str, t.Any]:
+        return self._get(path, params or {})
 
     def get_tv_channels(self, limit: int = 30, **kwargs) -> Collection:
         return self._get_collection('https://rutube.ru/api/video/topic/1/', limit=limit, **kwargs)
@@ -184,6 +293,36 @@ class RutubeApi:
             'av1': 1,
         }))
 
+    def get_stream_url(self, video_id: str, resolution: t.Optional[t.Tuple[int, int]] = None) -> t.Optional[str]:
+        """
+        Возвращает ссылку на поток видео в наилучшем качестве, не превышающем разрешение resolution.
+
+        Выбранный поток кэшируется для каждого разрешения, но не дольше срока действия ссылок на него.
+        """
+        resolution = tuple(resolution or get_screen_resolution())
+        key = metadata_cache.make_key(video_id, *resolution)
+        cached = metadata_cache.get('rutube', 'stream', key)
+
+        if cached is not None:
+            return cached['url']
+
+        video = self.get_video_by_id(video_id)
+        stream_url = video.select_variant(resolution)
+
+        if stream_url is None:
+            return None
+
+        expires = [e for e in (get_url_expiry(video.url), get_url_expiry(stream_url)) if e is not None]
+        ttl = RUTUBE_STREAM_TTL.total_seconds()
+
+        if expires:
+            # Запас в минуту, чтобы ссылка не истекла к моменту начала воспроизведения.
+            ttl = min(ttl, min(expires) - time.time() - 60)
+
+        metadata_cache.set('rutube', 'stream', key, {'url': stream_url}, timedelta(seconds=ttl))
+
+        return stream_url
+
     def get_user(self, person_id: int) -> t.Dict[str, t.Any]:
         """Возвращает пользователя с указанным идентификатором."""
         return self._get_resource('/profile/user/{person_id}/', params={
@@ -212,19 +351,23 @@ class Video(UserDict):
 
     @cached_property
     def best_quality_url(self) -> t.Optional[str]:
+        return self.select_variant(get_screen_resolution())
+
+    def select_variant(self, resolution: t.Tuple[int, int]) -> t.Optional[str]:
+        """Возвращает ссылку на вариант потока с наибольшим разрешением, не превышающим resolution."""
         if self.playlist is None:
             return None
 
-        variants = sorted([
-            v
-            for v in self.playlist.playlists
-            if v.stream_info.resolution <= get_screen_resolution()
-        ], key=lambda v: v.stream_info.resolution, reverse=True)
+        variants = [v for v in self.playlist.playlists if v.stream_info.resolution]
+        suitable = [v for v in variants if v.stream_info.resolution <= tuple(resolution)]
 
-        if not variants:
-            variants = self.playlist.playlists
+        if suitable:
+            return max(suitable, key=lambda v: v.stream_info.resolution).uri
 
-        return variants[0].uri
+        if self.playlist.playlists:
+            return self.playlist.playlists[0].uri
+
+        return None
 
 
 rutube_session = RutubeApi()
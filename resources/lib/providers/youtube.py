@@ -1,18 +1,24 @@
 from collections import UserDict
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from functools import cached_property, wraps
 import re
+import threading
+import time
 from urllib.parse import urlparse, parse_qs
 import typing as t
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from kodi_useful import current_addon
 from kodi_useful.exceptions import MultipleObjectsFound, ObjectNotFound
+from kodi_useful.http.client import Session
 from kodi_useful.utils import get_screen_resolution
 from requests import HTTPError
 
+from ..cache import metadata_cache
+from ..feed import FEED_RATE_LIMIT_PAUSE, QuotaExceeded
 from ..parsers import make_session
-from ..storage import ItemType
+from ..storage import close_connection, Item, ItemType
 from ..utils import re_search
 
 
@@ -21,6 +27,23 @@ _T = t.TypeVar('_T')
 YOUTUBE_BASE_URL = 'https://www.youtube.com'
 YOUTUBE_MAX_RESULTS = 50
 
+# Время жизни ответов API в постоянном кэше по типу ресурса.
+YOUTUBE_CACHE_TTL = {
+    'channels': timedelta(days=1),
+    'playlists': timedelta(hours=6),
+    'playlistItems': timedelta(minutes=15),
+    'videos': timedelta(hours=1),
+}
+
+# Суточная квота API восстанавливается в полночь по тихоокеанскому времени (с учетом летнего времени).
+try:
+    YOUTUBE_QUOTA_TZ = ZoneInfo('America/Los_Angeles')
+except ZoneInfoNotFoundError:
+    # В Python без базы часовых поясов (например, Kodi под Windows) остается зимнее смещение.
+    YOUTUBE_QUOTA_TZ = timezone(timedelta(hours=-8))
+YOUTUBE_QUOTA_ERRORS = ('quotaExceeded', 'dailyLimitExceeded')
+YOUTUBE_RATE_LIMIT_ERRORS = ('rateLimitExceeded', 'userRateLimitExceeded')
+
 
 def adapter(url: str):
     result = urlparse(url)
@@ -71,20 +94,65 @@ def adapter(url: str):
             'upload_playlist_id': obj.upload_playlist_id,
         }
 
-    thumbnail = youtube_session.http.download_file(obj.thumbnail) if obj.thumbnail else ''
-    cover = youtube_session.http.download_file(obj.cover) if obj.cover else ''
-
     return {
         'url': url,
         'item_type': item_type,
         'is_folder': is_folder,
         'title': obj.title,
-        'thumbnail': thumbnail,
-        'cover': cover,
+        'description': obj.description,
+        'thumbnail': obj.thumbnail,
+        'cover': obj.cover,
         'data': data,
     }
 
 
+def get_quota_reset() -> float:
+    """Возвращает время (unix timestamp) ближайшего восстановления суточной квоты API."""
+    now = datetime.now(YOUTUBE_QUOTA_TZ)
+    return (now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)).timestamp()
+
+
+def fetch_feed(item: Item, limit: int) -> t.Tuple[t.List[t.Dict[str, t.Any]], str]:
+    """Возвращает первую страницу видео канала или плейлиста для фонового обновления."""
+    if item.item_type == ItemType.YOUTUBE_CHANNEL:
+        playlist_id = item.data['upload_playlist_id']
+    else:
+        playlist_id = item.data['playlist_id']
+
+    try:
+        videos = youtube_session.get_videos(playlist_id, limit=limit)
+    except YouTubeApiError as err:
+        reasons = {e.get('reason') for e in err.errors}
+
+        if reasons.intersection(YOUTUBE_QUOTA_ERRORS):
+            raise QuotaExceeded('youtube', get_quota_reset()) from err
+
+        if reasons.intersection(YOUTUBE_RATE_LIMIT_ERRORS):
+            raise QuotaExceeded('youtube', time.time() + FEED_RATE_LIMIT_PAUSE.total_seconds()) from err
+
+        raise
+
+    entries = [
+        {
+            'video_id': v['id'],
+            'item_type': ItemType.YOUTUBE_VIDEO,
+            'title': v.title,
+            'description': v.description,
+            'url': f'{YOUTUBE_BASE_URL}/watch?v={v["id"]}',
+            'thumbnail': v.thumbnail,
+            'cover': v.cover,
+            'published': v.published,
+            'data': {
+                'video_id': v['id'],
+                'duration': v.duration,
+            },
+        }
+        for v in videos
+    ]
+
+    return entries, videos.next_page or ''
+
+
 def catch_http_error(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
@@ -222,28 +290,45 @@ class YouTubeApiError(Exception):
 
 
 class YouTubeApi:
+    HOST = 'youtube.googleapis.com'
+
     def __init__(self, api_key: str = '') -> None:
         self._api_key = api_key
+        self._http: t.Optional[Session] = None
+        self._http_api_key: t.Optional[str] = None
+        self._http_lock = threading.Lock()
 
     @property
-    def http(self):
-        return make_session(
-            base_url='https://youtube.googleapis.com/youtube/v3/',
-            params={
-                'key': self._api_key or current_addon.get_setting('youtube.apikey'),
-            },
-            headers={
-                'Accept': 'application/json',
-                'Accept-Language': 'ru-RU,ru;q=0.7',
-                # 'Authorization': 'Bearer %s' % token,
-                'Cache-Control': 'no-cache',
-                'Pragma': 'no-cache',
-                'Content-Type': 'application/json',
-            },
-            cache={
-                'ignored_parameters': ['key'],
-            },
-        )
+    def http(self) -> Session:
+        """
+        HTTP сессия для запросов к YouTube Data API.
+
+        Сессия создается один раз на процесс и пересоздается только после смены API ключа в настройках.
+        """
+        api_key = self._api_key or current_addon.get_setting('youtube.apikey')
+
+        with self._http_lock:
+            if self._http is None or self._http_api_key != api_key:
+                self._http = make_session(
+                    base_url=f'https://{self.HOST}/youtube/v3/',
+                    params={
+                        'key': api_key,
+                    },
+                    headers={
+                        'Accept': 'application/json',
+                        'Accept-Language': 'ru-RU,ru;q=0.7',
+                        # 'Authorization': 'Bearer %s' % token,
+                        'Cache-Control': 'no-cache',
+                        'Pragma': 'no-cache',
+                        'Content-Type': 'application/json',
+                    },
+                    cache={
+                        'ignored_parameters': ['key'],
+                    },
+                )
+                self._http_api_key = api_key
+
+            return self._http
 
     def _get_channel(self, **params) -> Channel:
         response_data = self._get_resource(
@@ -251,6 +336,17 @@ class YouTubeApi:
         )
         return Channel(**response_data)
 
+    def _get(self, path: str, params: t.Dict[str, t.Any]) -> t.Dict[str, t.Any]:
+        """Выполняет GET запрос к API, ответ сохраняется в постоянном кэше."""
+        kind = path.strip('/')
+        return metadata_cache.get_or_fetch(
+            'youtube',
+            kind,
+            metadata_cache.make_key(**params),
+            lambda: self.http.get(path, params=params).json(),
+            YOUTUBE_CACHE_TTL.get(kind, timedelta(minutes=30)),
+        )
+
     @catch_http_error
     def _get_collection(
         self,
@@ -261,20 +357,19 @@ class YouTubeApi:
     ) -> t.Dict[str, t.Any]:
         params['maxResults'] = YOUTUBE_MAX_RESULTS if limit > YOUTUBE_MAX_RESULTS else limit
         params['pageToken'] = page_token
-        return self.http.get(path, params=params).json()
+        return self._get(path, params)
 
     @catch_http_error
     def _get_resource(self, path: str, **params) -> t.Dict[str, t.Any]:
-        response = self.http.get(path, params=params)
-        response_data = response.json()
+        response_data = self._get(path, params)
 
         if response_data['pageInfo']['totalResults'] == 1:
             return response_data['items'][0]
 
         if response_data['pageInfo']['totalResults'] > 1:
-            raise MultipleObjectsFound(f'Multiple results found for: {response.url}.')
+            raise MultipleObjectsFound(f'Multiple results found for: {path} {params}.')
 
-        raise ObjectNotFound(f'No result found: {response.url}.')
+        raise ObjectNotFound(f'No result found: {path} {params}.')
 
     def get_channel_by_id(self, channel_id: str) -> Channel:
         """Возвращает YouTube канал с указанным идентификатором."""
@@ -310,23 +405,52 @@ class YouTubeApi:
         response_data = self._get_resource('/videos', id=video_id, part='snippet,contentDetails')
         return Video(**response_data)
 
-    def get_videos(
-        self,
-        playlist_id: str,
-        page_token: str = '',
-        limit: int = YOUTUBE_MAX_RESULTS,
-    ) -> Collection[Video]:
-        """Возвращает видеозаписи из YouTube плейлиста с указанным идентификатором."""
-        playlist_items = self._get_collection(
+    def _get_playlist_items(self, playlist_id: str, page_token: str, limit: int) -> t.Dict[str, t.Any]:
+        return self._get_collection(
             '/playlistItems', playlistId=playlist_id, part='contentDetails', limit=limit, page_token=page_token
         )
+
+    def _get_playlist_videos(self, playlist_items: t.Dict[str, t.Any]) -> Collection[Video]:
         videos = self._get_collection(
             '/videos',
             id=','.join(i['contentDetails']['videoId'] for i in playlist_items['items']),
             part='snippet,contentDetails',
         )
-        playlist_items['items'] = videos['items']
-        return Collection.from_response(playlist_items, item_class=Video)
+        return Collection.from_response({**playlist_items, 'items': videos['items']}, item_class=Video)
+
+    def get_videos(
+        self,
+        playlist_id: str,
+        page_token: str = '',
+        limit: int = YOUTUBE_MAX_RESULTS,
+    ) -> Collection[Video]:
+        """Возвращает видеозаписи из YouTube плейлиста с указанным идентификатором."""
+        return self._get_playlist_videos(self._get_playlist_items(playlist_id, page_token, limit))
+
+    def prefetch_videos(
+        self,
+        playlist_id: str,
+        page_token: str,
+        limit: int = YOUTUBE_MAX_RESULTS,
+    ) -> threading.Thread:
+        """
+        Загружает страницу видеозаписей в фоне, чтобы она оказалась в постоянном кэше.
+
+        Вызывается после того, как элементы директории переданы Kodi. Поток не демонический,
+        поэтому загрузка не прерывается при выходе: процесс плагина дождется ее уже после показа списка.
+        """
+        def prefetch():
+            try:
+                self.get_videos(playlist_id, page_token=page_token, limit=limit)
+            except Exception as err:
+                current_addon.logger.debug(f'Failed to prefetch playlist {playlist_id!r} page: {err}')
+            finally:
+                close_connection()
+
+        thread = threading.Thread(target=prefetch, name='uplayer-youtube-prefetch')
+        thread.start()
+
+        return thread
 
 
 youtube_session = YouTubeApi()
@@ -1,8 +1,10 @@
+from datetime import timedelta
 import time
 
 from kodi_useful import current_addon
 import xbmc
 
+from .feed import feed_refresher
 from .webserver import httpd
 
 
@@ -11,12 +13,23 @@ class Monitor(xbmc.Monitor):
         self._pending = False
         self._last_changed = 0
         self._update_httpd_status()
+        self._update_feed_status()
+
+    def _update_feed_status(self):
+        feed_refresher.configure(
+            enabled=current_addon.get_setting('feed.enabled', bool),
+            interval=timedelta(minutes=current_addon.get_setting('feed.interval', int)),
+        )
 
     def _update_httpd_status(self):
         httpd.set_address(
             current_addon.get_setting('httpd.host'),
             current_addon.get_setting('httpd.port', int),
         )
+        httpd.configure(
+            max_workers=current_addon.get_setting('httpd.workers', int),
+            request_timeout=current_addon.get_setting('httpd.timeout', int),
+        )
 
         if not current_addon.get_setting('httpd.enabled', bool):
             httpd.stop()
@@ -33,8 +46,10 @@ class Monitor(xbmc.Monitor):
         if self._pending and time.time() - self._last_changed >= 3:
             self._pending = False
             self._update_httpd_status()
+            self._update_feed_status()
 
     def stop(self):
+        feed_refresher.stop()
         httpd.stop()
 
 
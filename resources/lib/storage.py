@@ -1,11 +1,25 @@
+import base64
 from datetime import datetime
-from dataclasses import dataclass, field
+from dataclasses import astuple, dataclass, field, fields
 import enum
+import json
+import os
+import sqlite3
+import threading
 import typing as t
 
 from kodi_useful import current_addon
-from kodi_useful.database import select, Connection, Model
+from kodi_useful.database import Connection, Model
 
+from .events import change_feed, EventType
+
+
+SQL_SCHEMA_VERSION = '''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        ts DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+'''
 
 SQL_SCHEMA = '''
     CREATE TABLE IF NOT EXISTS item_type (
@@ -60,6 +74,320 @@ SQL_SCHEMA = '''
     );
 '''
 
+SQL_ITEM_LISTING_INDEXES = '''
+    CREATE INDEX IF NOT EXISTS item_folder_title_idx ON item (parent_id, is_folder, title, id);
+    CREATE INDEX IF NOT EXISTS item_folder_ts_idx ON item (parent_id, is_folder, ts, id);
+'''
+
+SQL_METADATA_CACHE = '''
+    CREATE TABLE IF NOT EXISTS cache_entry (
+        key TEXT PRIMARY KEY,
+        provider VARCHAR(16) NOT NULL,
+        kind VARCHAR(32) NOT NULL,
+        value JSON NOT NULL,
+        size INTEGER NOT NULL,
+        expires REAL NOT NULL,
+        accessed REAL NOT NULL
+    );
+    
+    CREATE INDEX IF NOT EXISTS cache_entry_accessed_idx ON cache_entry (accessed);
+    
+    CREATE TABLE IF NOT EXISTS cache_stats (
+        provider VARCHAR(16) NOT NULL,
+        kind VARCHAR(32) NOT NULL,
+        hits INTEGER NOT NULL DEFAULT 0,
+        misses INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (provider, kind)
+    );
+'''
+
+SQL_RUTUBE_CHANNEL_ALIAS = '''
+    CREATE TABLE IF NOT EXISTS rutube_channel_alias (
+        name TEXT PRIMARY KEY,
+        channel_id INTEGER NOT NULL
+    );
+'''
+
+SQL_FOLDER_VERSION = '''
+    CREATE TABLE IF NOT EXISTS folder_version (
+        folder_id INTEGER PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0,
+        ts DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+    
+    CREATE TRIGGER IF NOT EXISTS item_insert_folder_version AFTER INSERT ON item
+    BEGIN
+        INSERT INTO folder_version (folder_id, version) VALUES (COALESCE(NEW.parent_id, 0), 1)
+            ON CONFLICT(folder_id) DO UPDATE SET version = version + 1, ts = CURRENT_TIMESTAMP;
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS item_update_folder_version AFTER UPDATE ON item
+    BEGIN
+        INSERT INTO folder_version (folder_id, version) VALUES (COALESCE(OLD.parent_id, 0), 1)
+            ON CONFLICT(folder_id) DO UPDATE SET version = version + 1, ts = CURRENT_TIMESTAMP;
+        INSERT INTO folder_version (folder_id, version) VALUES (COALESCE(NEW.parent_id, 0), 1)
+            ON CONFLICT(folder_id) DO UPDATE SET version = version + 1, ts = CURRENT_TIMESTAMP;
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS item_delete_folder_version AFTER DELETE ON item
+    BEGIN
+        INSERT INTO folder_version (folder_id, version) VALUES (COALESCE(OLD.parent_id, 0), 1)
+            ON CONFLICT(folder_id) DO UPDATE SET version = version + 1, ts = CURRENT_TIMESTAMP;
+    END;
+'''
+
+SQL_FEED = '''
+    CREATE TABLE IF NOT EXISTS feed_source (
+        item_id INTEGER PRIMARY KEY,
+        refreshed REAL NOT NULL DEFAULT 0,
+        next_refresh REAL NOT NULL DEFAULT 0,
+        failures INTEGER NOT NULL DEFAULT 0,
+        page_size INTEGER NOT NULL DEFAULT 0,
+        next_page TEXT NOT NULL DEFAULT '',
+        error TEXT NOT NULL DEFAULT ''
+    );
+    
+    CREATE TABLE IF NOT EXISTS feed_entry (
+        source_id INTEGER NOT NULL,
+        video_id TEXT NOT NULL,
+        provider VARCHAR(16) NOT NULL,
+        item_type VARCHAR(16) NOT NULL,
+        position INTEGER,
+        title TEXT NOT NULL,
+        description TEXT NOT NULL DEFAULT '',
+        url TEXT NOT NULL DEFAULT '',
+        thumbnail VARCHAR(255) NOT NULL DEFAULT '',
+        cover VARCHAR(255) NOT NULL DEFAULT '',
+        data JSON NOT NULL DEFAULT '{}',
+        published DATETIME NOT NULL,
+        PRIMARY KEY (source_id, video_id)
+    );
+    
+    CREATE INDEX IF NOT EXISTS feed_entry_position_idx ON feed_entry (source_id, position);
+    
+    CREATE TRIGGER IF NOT EXISTS item_delete_feed AFTER DELETE ON item
+    BEGIN
+        DELETE FROM feed_entry WHERE source_id = OLD.id;
+        DELETE FROM feed_source WHERE item_id = OLD.id;
+    END;
+'''
+
+SQL_FEED_VIDEO = '''
+    CREATE TABLE IF NOT EXISTS feed_video (
+        provider VARCHAR(16) NOT NULL,
+        video_id TEXT NOT NULL,
+        source_id INTEGER NOT NULL,
+        published DATETIME NOT NULL,
+        PRIMARY KEY (provider, video_id)
+    );
+    
+    CREATE INDEX IF NOT EXISTS feed_video_published_idx ON feed_video (published, provider, video_id);
+    
+    INSERT INTO feed_video (provider, video_id, source_id, published)
+        SELECT provider, video_id, MIN(source_id), MAX(published) FROM feed_entry WHERE true
+        GROUP BY provider, video_id
+    ON CONFLICT(provider, video_id) DO NOTHING;
+    
+    CREATE TRIGGER IF NOT EXISTS feed_entry_insert_video AFTER INSERT ON feed_entry
+    BEGIN
+        INSERT INTO feed_video (provider, video_id, source_id, published)
+            VALUES (NEW.provider, NEW.video_id, NEW.source_id, NEW.published)
+        ON CONFLICT(provider, video_id) DO NOTHING;
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS feed_entry_delete_video AFTER DELETE ON feed_entry
+    BEGIN
+        DELETE FROM feed_video
+        WHERE provider = OLD.provider AND video_id = OLD.video_id AND source_id = OLD.source_id;
+        
+        INSERT INTO feed_video (provider, video_id, source_id, published)
+            SELECT provider, video_id, source_id, published FROM feed_entry
+            WHERE provider = OLD.provider AND video_id = OLD.video_id
+            ORDER BY source_id
+            LIMIT 1
+        ON CONFLICT(provider, video_id) DO NOTHING;
+    END;
+'''
+
+# Выполняется функцией create_item_search_index: сборка SQLite без FTS5 оставляет только поиск через LIKE.
+SQL_ITEM_SEARCH = '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS item_fts USING fts5(
+        title,
+        description,
+        content='item',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    );
+    
+    CREATE TRIGGER IF NOT EXISTS item_fts_insert AFTER INSERT ON item
+    BEGIN
+        INSERT INTO item_fts (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS item_fts_delete AFTER DELETE ON item
+    BEGIN
+        INSERT INTO item_fts (item_fts, rowid, title, description)
+            VALUES ('delete', OLD.id, OLD.title, OLD.description);
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS item_fts_update AFTER UPDATE OF title, description ON item
+    BEGIN
+        INSERT INTO item_fts (item_fts, rowid, title, description)
+            VALUES ('delete', OLD.id, OLD.title, OLD.description);
+        INSERT INTO item_fts (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+    END;
+    
+    INSERT INTO item_fts (item_fts) VALUES ('rebuild');
+'''
+
+
+def create_item_search_index(conn: Connection) -> None:
+    """Создает полнотекстовый индекс по названию и описанию элементов, если SQLite поддерживает FTS5."""
+    conn.execute('SAVEPOINT item_search')
+
+    try:
+        execute_script(conn, SQL_ITEM_SEARCH)
+    except Exception as err:
+        conn.execute('ROLLBACK TO item_search')
+        current_addon.logger.info(f'Full-text search is not available: {err}')
+
+    conn.execute('RELEASE item_search')
+
+
+# Таблица замыкания дерева: для каждого элемента - все его предки с расстоянием до них (сам элемент с depth = 0).
+# folder_size хранит число всех вложенных элементов папки; обе таблицы поддерживаются триггерами.
+SQL_ITEM_CLOSURE = '''
+    CREATE TABLE IF NOT EXISTS item_closure (
+        ancestor INTEGER NOT NULL,
+        descendant INTEGER NOT NULL,
+        depth INTEGER NOT NULL,
+        PRIMARY KEY (ancestor, descendant)
+    ) WITHOUT ROWID;
+    
+    CREATE INDEX IF NOT EXISTS item_closure_descendant_idx ON item_closure (descendant, depth);
+    
+    CREATE TABLE IF NOT EXISTS folder_size (
+        folder_id INTEGER PRIMARY KEY,
+        items INTEGER NOT NULL DEFAULT 0
+    );
+    
+    INSERT INTO item_closure (ancestor, descendant, depth)
+        WITH RECURSIVE tree (ancestor, descendant, depth) AS (
+            SELECT id, id, 0 FROM item
+            UNION ALL
+            SELECT tree.ancestor, item.id, tree.depth + 1 FROM tree JOIN item ON item.parent_id = tree.descendant
+        )
+        SELECT ancestor, descendant, depth FROM tree;
+    
+    INSERT INTO folder_size (folder_id, items)
+        SELECT ancestor, COUNT(*) FROM item_closure WHERE depth > 0 GROUP BY ancestor;
+    
+    CREATE TRIGGER IF NOT EXISTS item_insert_closure AFTER INSERT ON item
+    BEGIN
+        INSERT INTO item_closure (ancestor, descendant, depth)
+            SELECT ancestor, NEW.id, depth + 1 FROM item_closure WHERE descendant = NEW.parent_id
+            UNION ALL
+            SELECT NEW.id, NEW.id, 0;
+        
+        INSERT INTO folder_size (folder_id, items)
+            SELECT ancestor, 1 FROM item_closure WHERE descendant = NEW.id AND depth > 0
+        ON CONFLICT(folder_id) DO UPDATE SET items = items + 1;
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS item_move_closure AFTER UPDATE OF parent_id ON item
+    WHEN OLD.parent_id IS NOT NEW.parent_id
+    BEGIN
+        UPDATE folder_size SET items = items - (SELECT COUNT(*) FROM item_closure WHERE ancestor = NEW.id)
+        WHERE folder_id IN (SELECT ancestor FROM item_closure WHERE descendant = NEW.id AND depth > 0);
+        
+        DELETE FROM item_closure
+        WHERE descendant IN (SELECT descendant FROM item_closure WHERE ancestor = NEW.id)
+            AND ancestor NOT IN (SELECT descendant FROM item_closure WHERE ancestor = NEW.id);
+        
+        INSERT INTO item_closure (ancestor, descendant, depth)
+            SELECT p.ancestor, c.descendant, p.depth + c.depth + 1
+            FROM item_closure AS p, item_closure AS c
+            WHERE p.descendant = NEW.parent_id AND c.ancestor = NEW.id;
+        
+        INSERT INTO folder_size (folder_id, items)
+            SELECT ancestor, (SELECT COUNT(*) FROM item_closure WHERE ancestor = NEW.id)
+            FROM item_closure WHERE descendant = NEW.id AND depth > 0
+        ON CONFLICT(folder_id) DO UPDATE SET items = items + excluded.items;
+    END;
+    
+    CREATE TRIGGER IF NOT EXISTS item_delete_closure AFTER DELETE ON item
+    BEGIN
+        UPDATE folder_size SET items = items - 1
+        WHERE folder_id IN (SELECT ancestor FROM item_closure WHERE descendant = OLD.id AND depth > 0);
+        
+        DELETE FROM item_closure WHERE descendant = OLD.id OR ancestor = OLD.id;
+        DELETE FROM folder_size WHERE folder_id = OLD.id;
+    END;
+'''
+
+# Поля Item.data, которые нужны для вывода списков и ссылок, доступны как вычисляемые столбцы,
+# поэтому при выводе директории JSON каждой строки не разбирается. У столбцов нет объявленного типа,
+# чтобы значение сохраняло тип из JSON: например, числовой идентификатор канала Rutube не становится строкой.
+SQL_ITEM_DATA_COLUMNS = '''
+    ALTER TABLE item ADD COLUMN data_duration
+        GENERATED ALWAYS AS (json_extract(data, '$.duration')) VIRTUAL;
+    ALTER TABLE item ADD COLUMN data_video_id
+        GENERATED ALWAYS AS (json_extract(data, '$.video_id')) VIRTUAL;
+    ALTER TABLE item ADD COLUMN data_channel_id
+        GENERATED ALWAYS AS (json_extract(data, '$.channel_id')) VIRTUAL;
+    ALTER TABLE item ADD COLUMN data_playlist_id
+        GENERATED ALWAYS AS (json_extract(data, '$.playlist_id')) VIRTUAL;
+    ALTER TABLE item ADD COLUMN data_upload_playlist_id
+        GENERATED ALWAYS AS (json_extract(data, '$.upload_playlist_id')) VIRTUAL;
+    ALTER TABLE item ADD COLUMN data_username
+        GENERATED ALWAYS AS (json_extract(data, '$.username')) VIRTUAL;
+    ALTER TABLE item ADD COLUMN data_post_id
+        GENERATED ALWAYS AS (json_extract(data, '$.post_id')) VIRTUAL;
+    ALTER TABLE item ADD COLUMN data_media_id
+        GENERATED ALWAYS AS (json_extract(data, '$.media_id')) VIRTUAL;
+    ALTER TABLE item ADD COLUMN data_artwork_thumbnail
+        GENERATED ALWAYS AS (json_extract(data, '$.artwork.thumbnail')) VIRTUAL;
+    ALTER TABLE item ADD COLUMN data_artwork_cover
+        GENERATED ALWAYS AS (json_extract(data, '$.artwork.cover')) VIRTUAL;
+'''
+
+# Путь к значению в Item.data для каждого вычисляемого столбца data_<name>.
+ITEM_DATA_COLUMNS: t.Dict[str, t.Tuple[str, ...]] = {
+    'duration': ('duration',),
+    'video_id': ('video_id',),
+    'channel_id': ('channel_id',),
+    'playlist_id': ('playlist_id',),
+    'upload_playlist_id': ('upload_playlist_id',),
+    'username': ('username',),
+    'post_id': ('post_id',),
+    'media_id': ('media_id',),
+    'artwork_thumbnail': ('artwork', 'thumbnail'),
+    'artwork_cover': ('artwork', 'cover'),
+}
+
+# Каждый элемент - скрипт миграции или функция, которая получает соединение; номер версии схемы равен индексу + 1.
+# Новые изменения схемы добавляются только в конец списка.
+MIGRATIONS: t.List[t.Union[str, t.Callable[[Connection], None]]] = [
+    SQL_SCHEMA,
+    SQL_ITEM_LISTING_INDEXES,
+    SQL_METADATA_CACHE,
+    SQL_RUTUBE_CHANNEL_ALIAS,
+    SQL_FOLDER_VERSION,
+    SQL_FEED,
+    SQL_FEED_VIDEO,
+    create_item_search_index,
+    SQL_ITEM_CLOSURE,
+    SQL_ITEM_DATA_COLUMNS,
+]
+
+# Сколько секунд ждать, пока другой процесс закончит миграцию базы данных.
+MIGRATION_LOCK_TIMEOUT = 60
+
+_local = threading.local()
+_schema_lock = threading.Lock()
+_schema_ready = False
+_search_available: t.Optional[bool] = None
+
 
 class ItemType(enum.StrEnum):
     BOOSTY_PROFILE = enum.auto()
@@ -77,16 +405,216 @@ class ItemType(enum.StrEnum):
     YOUTUBE_VIDEO = enum.auto()
 
 
+def execute_script(conn: Connection, script: str) -> None:
+    """
+    Выполняет SQL скрипт по одному выражению в текущей транзакции.
+
+    В отличие от executescript открытая транзакция перед выполнением не фиксируется.
+    """
+    statement = ''
+
+    for part in script.split(';'):
+        statement += part + ';'
+
+        # Точка с запятой может быть внутри строки или тела триггера, тогда выражение еще не закончено.
+        if sqlite3.complete_statement(statement):
+            if statement.strip(' \t\n;'):
+                conn.execute(statement)
+            statement = ''
+
+
+def migrate(conn: Connection) -> None:
+    """
+    Применяет к базе данных миграции, которые еще не были выполнены.
+
+    Плагин и сервис могут запуститься одновременно, поэтому версия схемы читается и миграции
+    выполняются в одной транзакции с блокировкой на запись: второй процесс дождется первого
+    и увидит уже обновленную версию.
+    """
+    conn.executescript(SQL_SCHEMA_VERSION, raw=True)
+
+    busy_timeout = conn.execute('PRAGMA busy_timeout').fetchone()[0]
+    conn.execute(f'PRAGMA busy_timeout = {MIGRATION_LOCK_TIMEOUT * 1000}')
+
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        version = conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
+
+        for number, script in enumerate(MIGRATIONS[version:], start=version + 1):
+            current_addon.logger.debug(f'Applying database migration {number}')
+
+            if callable(script):
+                script(conn)
+            else:
+                execute_script(conn, script)
+            conn.execute('INSERT INTO schema_version (version) VALUES (?)', (number,))
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute(f'PRAGMA busy_timeout = {busy_timeout}')
+
+
 def get_connection() -> Connection:
+    """
+    Возвращает соединение с базой данных для текущего потока.
+
+    Соединение создается один раз на поток и переиспользуется всеми запросами:
+    в плагине это одно соединение на вызов, в сервисе - по одному на каждый поток веб-сервера.
+    Схема проверяется и мигрируется только при первом подключении в процессе.
+    """
+    global _schema_ready
+
+    conn = getattr(_local, 'connection', None)
+
+    if conn is not None:
+        return conn
+
     db_path = current_addon.get_data_path('player.db')
     current_addon.logger.debug(db_path)
 
-    conn = Connection(db_path, echo=True)
-    conn.executescript(SQL_SCHEMA, raw=True)
+    conn = Connection(db_path, echo=current_addon.debug)
+
+    if not _schema_ready:
+        with _schema_lock:
+            if not _schema_ready:
+                migrate(conn)
+                _schema_ready = True
+
+    _local.connection = conn
 
     return conn
 
 
+def close_connection() -> None:
+    """Закрывает соединение с базой данных текущего потока, если оно было открыто."""
+    conn = getattr(_local, 'connection', None)
+
+    if conn is not None:
+        _local.connection = None
+        conn.close()
+
+
+def make_search_query(text: str) -> str:
+    """
+    Превращает строку поиска в запрос FTS5.
+
+    Каждое слово берется в кавычки, чтобы символы синтаксиса FTS5 искались как обычный текст;
+    все слова обязательны, а последнее ищется как префикс, пока пользователь его дописывает.
+    """
+    terms = ['"%s"' % word.replace('"', '""') for word in text.split()]
+
+    if terms:
+        terms[-1] += '*'
+
+    return ' '.join(terms)
+
+
+def decode_token(token: str) -> t.List[t.Any]:
+    """Возвращает значения, упакованные в токен функцией encode_token."""
+    padding = '=' * (-len(token) % 4)
+    values = json.loads(base64.urlsafe_b64decode(token + padding))
+
+    if not isinstance(values, list):
+        raise ValueError(f'Invalid token: {token!r}')
+
+    return values
+
+
+def encode_token(values: t.Sequence[t.Any]) -> str:
+    """Упаковывает значения в непрозрачный токен, пригодный для передачи в URL."""
+    payload = json.dumps(list(values), ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+@dataclass(frozen=True)
+class PageCursor:
+    """Позиция последнего показанного элемента для постраничного вывода по ключу (keyset pagination)."""
+    is_folder: bool
+    title: str
+    ts: str
+    id: int
+
+    @classmethod
+    def decode(cls, token: str) -> 'PageCursor':
+        """Восстанавливает позицию из непрозрачного токена."""
+        try:
+            is_folder, title, ts, item_id = decode_token(token)
+            return cls(bool(is_folder), str(title), str(ts), int(item_id))
+        except (TypeError, ValueError) as err:
+            raise ValueError(f'Invalid page cursor: {token!r}') from err
+
+    def encode(self) -> str:
+        """Возвращает непрозрачный токен, пригодный для передачи в URL."""
+        return encode_token(astuple(self))
+
+    @classmethod
+    def from_item(cls, item: 'Item') -> 'PageCursor':
+        ts = item.ts.isoformat(' ') if isinstance(item.ts, datetime) else str(item.ts)
+        return cls(bool(item.is_folder), item.title, ts, item.id)
+
+
+def get_folder_version(folder_id: t.Optional[int]) -> t.Tuple[int, str]:
+    """
+    Возвращает счетчик изменений директории и время последнего изменения в UTC.
+
+    Счетчик увеличивается триггерами при любом добавлении, изменении или удалении элементов директории.
+    """
+    row = get_connection().execute(
+        'SELECT version, ts FROM folder_version WHERE folder_id = ?', (folder_id or 0,),
+    ).fetchone()
+    return (row[0], row[1]) if row is not None else (0, '')
+
+
+class JSONField:
+    """
+    Поле модели со словарем, которое хранит JSON из базы данных строкой и разбирает его при первом обращении.
+    """
+
+    def __set_name__(self, owner, name: str) -> None:
+        self._attr = f'_{name}'
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            # Значение по умолчанию для конструктора dataclass.
+            return None
+
+        value = instance.__dict__.get(self._attr)
+
+        if value is None or isinstance(value, (str, bytes)):
+            value = json.loads(value) if value else {}
+            instance.__dict__[self._attr] = value
+
+        return value
+
+    def __set__(self, instance, value) -> None:
+        instance.__dict__[self._attr] = value
+
+
+class ItemMixin:
+    """Общие методы чтения для модели Item и строки списка ItemRow."""
+    __slots__ = ()
+
+    @property
+    def provider(self) -> str:
+        return ItemType(self.item_type).value.split('_')[0]
+
+    def get_art(self, name: str) -> str:
+        """
+        Возвращает путь к изображению thumbnail или cover.
+
+        Если локальный файл был удален из кэша, возвращается исходная ссылка на изображение.
+        """
+        path = getattr(self, name)
+
+        if not path or path.startswith(('http://', 'https://')) or os.path.exists(path):
+            return path
+
+        return self.get_data(f'artwork_{name}', path)
+
+
 @dataclass(eq=False)
 class BaseModel(Model):
     @classmethod
@@ -95,7 +623,7 @@ class BaseModel(Model):
 
 
 @dataclass(eq=False)
-class Item(BaseModel):
+class Item(BaseModel, ItemMixin):
     item_type: ItemType
     is_folder: bool
     title: str
@@ -105,38 +633,473 @@ class Item(BaseModel):
     url: str = ''
     thumbnail: str = ''
     cover: str = ''
-    data: t.Dict[str, t.Any] = field(default_factory=dict)
+    data: t.Dict[str, t.Any] = JSONField()
     ts: datetime = field(default_factory=datetime.utcnow)
 
+    def get_data(self, name: str, default: t.Any = None) -> t.Any:
+        """Возвращает значение из data по имени вычисляемого столбца (см. ITEM_DATA_COLUMNS)."""
+        value = self.data
+
+        for key in ITEM_DATA_COLUMNS[name]:
+            value = value.get(key) if isinstance(value, dict) else None
+
+        return default if value is None else value
+
+    @classmethod
+    def _iter_rows(
+        cls,
+        clauses: str,
+        parameters: t.Dict[str, t.Any],
+        limit: t.Optional[int] = None,
+        offset: int = 0,
+    ) -> t.Iterator['ItemRow']:
+        """Выполняет SELECT по таблице item с условиями clauses и по мере чтения курсора возвращает строки ItemRow."""
+        stmt = f'SELECT {ItemRow.SELECT} FROM item LEFT JOIN folder_size ON folder_id = item.id {clauses}'
+
+        if limit is not None:
+            stmt += ' LIMIT :limit OFFSET :offset'
+            parameters = {**parameters, 'limit': limit, 'offset': offset}
+
+        return map(ItemRow, cls.get_connection().execute(stmt, parameters))
+
     @property
-    def provider(self) -> str:
-        return ItemType(self.item_type).value.split('_')[0]
+    def page_token(self) -> str:
+        """Токен для запроса следующей страницы, начиная после текущего элемента."""
+        return PageCursor.from_item(self).encode()
+
+    def delete(self) -> None:
+        """Удаляет элемент вместе со всеми вложенными элементами одним запросом."""
+        conn = self.get_connection()
+
+        try:
+            conn.execute(
+                'DELETE FROM item WHERE id = :id OR id IN (SELECT descendant FROM item_closure WHERE ancestor = :id)',
+                {'id': self.id},
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        change_feed.publish(EventType.DELETED, self.parent_id, {'id': self.id})
+
+    def save(self):
+        is_new = self.id is None
+        result = super().save()
+        change_feed.publish(
+            EventType.CREATED if is_new else EventType.UPDATED,
+            self.parent_id,
+            {**self.as_dict(), 'page_token': self.page_token},
+        )
+        return result
 
     @classmethod
-    def select(cls, parent_id: t.Optional[int], limit: int, offset: int) -> t.Sequence['Item']:
-        stmt = select(cls)
-        parameters = {}
+    def insert_many(cls, items: t.Iterable['Item']) -> None:
+        """Сохраняет новые элементы одной транзакцией."""
+        items = list(items)
+        columns = [f.name for f in fields(cls) if f.name != 'id']
+        stmt = 'INSERT INTO item ({}) VALUES ({})'.format(
+            ', '.join(columns), ', '.join(f':{c}' for c in columns),
+        )
+        rows = [
+            {
+                **{c: getattr(i, c) for c in columns},
+                'item_type': str(i.item_type),
+                'data': json.dumps(i.data),
+                'ts': i.ts.isoformat(' '),
+            }
+            for i in items
+        ]
 
-        if parent_id is None:
-            stmt += ' WHERE parent_id IS NULL'
+        if not rows:
+            return None
+
+        conn = cls.get_connection()
+
+        try:
+            conn.executemany(stmt, rows)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        for parent_id in {i.parent_id for i in items}:
+            change_feed.publish(EventType.INVALIDATE, parent_id)
+
+    @classmethod
+    def _select_page(
+        cls,
+        parent_id: t.Optional[int],
+        is_folder: bool,
+        limit: int,
+        offset: int = 0,
+        cursor: t.Optional[PageCursor] = None,
+    ) -> t.Iterator['ItemRow']:
+        """
+        Возвращает страницу только папок (по названию) или только остальных элементов (от новых к старым).
+
+        Каждый из запросов полностью обслуживается своим индексом без сортировки во временном B-дереве.
+        """
+        stmt = 'WHERE parent_id IS :parent_id AND is_folder = :is_folder'
+        parameters = {'parent_id': parent_id, 'is_folder': int(is_folder)}
+
+        if cursor is not None:
+            parameters['cursor_id'] = cursor.id
+
+            if is_folder:
+                stmt += ' AND (title, id) > (:cursor_title, :cursor_id)'
+                parameters['cursor_title'] = cursor.title
+            else:
+                stmt += ' AND (ts, id) < (:cursor_ts, :cursor_id)'
+                parameters['cursor_ts'] = cursor.ts
+
+        if is_folder:
+            stmt += ' ORDER BY title ASC, id ASC'
         else:
-            stmt += ' WHERE parent_id = :parent_id'
-            parameters['parent_id'] = parent_id
-
-        stmt += '''
-        ORDER BY
-            is_folder DESC,
-            CASE WHEN is_folder = 1 THEN title END ASC,
-            CASE WHEN is_folder = 0 THEN ts END DESC
+            stmt += ' ORDER BY ts DESC, id DESC'
+
+        return cls._iter_rows(stmt, parameters, limit, offset)
+
+    @classmethod
+    def search(cls, text: str, limit: int, offset: int = 0) -> t.List['ItemRow']:
+        """
+        Возвращает элементы, в названии или описании которых есть все слова из text.
+
+        Результаты упорядочены по релевантности (BM25, совпадение в названии весит больше).
+        Без FTS5 выполняется поиск подстроки через LIKE от новых элементов к старым.
+        """
+        global _search_available
+
+        query = make_search_query(text)
+
+        if not query:
+            return []
+
+        conn = cls.get_connection()
+
+        if _search_available is None:
+            _search_available = conn.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'item_fts'",
+            ).fetchone()[0] > 0
+
+        if _search_available:
+            stmt = '''
+                JOIN (
+                    SELECT rowid AS search_id, bm25(item_fts, 10.0, 1.0) AS search_rank
+                    FROM item_fts
+                    WHERE item_fts MATCH :query
+                ) ON search_id = item.id
+                ORDER BY search_rank, item.id
+            '''
+            parameters = {'query': query}
+        else:
+            pattern = '%{}%'.format(text.strip().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_'))
+            stmt = '''
+                WHERE title LIKE :pattern ESCAPE '\\' OR description LIKE :pattern ESCAPE '\\'
+                ORDER BY ts DESC, id DESC
+            '''
+            parameters = {'pattern': pattern}
+
+        return list(cls._iter_rows(stmt, parameters, limit, offset))
+
+    @classmethod
+    def select_subtree(cls, folder_id: int) -> t.List['ItemRow']:
+        """Возвращает все вложенные элементы папки: сначала ближайшие, затем более глубокие."""
+        stmt = '''
+            JOIN item_closure ON descendant = item.id
+            WHERE ancestor = :folder_id AND depth > 0
+            ORDER BY depth, item.id
         '''
+        return list(cls._iter_rows(stmt, {'folder_id': folder_id}))
+
+    @classmethod
+    def get_folder_paths(cls, exclude_id: t.Optional[int] = None) -> t.List[t.Tuple[int, str]]:
+        """Возвращает все папки с полным путем к ним, кроме папки exclude_id и вложенных в нее."""
+        rows = cls.get_connection().execute(
+            '''
+            SELECT folder.id, (
+                SELECT group_concat(title, ' / ') FROM (
+                    SELECT ancestor_item.title FROM item_closure
+                    JOIN item AS ancestor_item ON ancestor_item.id = item_closure.ancestor
+                    WHERE item_closure.descendant = folder.id
+                    ORDER BY item_closure.depth DESC
+                )
+            ) AS path
+            FROM item AS folder
+            WHERE folder.item_type = :folder_type AND folder.id NOT IN (
+                SELECT descendant FROM item_closure WHERE ancestor = :exclude_id
+            )
+            ORDER BY path
+            ''',
+            {'folder_type': str(ItemType.FOLDER), 'exclude_id': exclude_id},
+        ).fetchall()
+        return [(folder_id, path) for folder_id, path in rows]
+
+    @classmethod
+    def _check_target_folder(cls, conn: Connection, parent_id: t.Optional[int]) -> None:
+        if parent_id is None:
+            return None
 
-        return cls.get_connection().query(
-            stmt.limit(limit).offset(offset), parameters,
+        row = conn.execute('SELECT item_type FROM item WHERE id = ?', (parent_id,)).fetchone()
+
+        if row is None or row[0] != ItemType.FOLDER:
+            raise ValueError(f'Folder with ID {parent_id} not found.')
+
+    @classmethod
+    def _get_roots(cls, conn: Connection, item_ids: t.Sequence[int]) -> t.List[int]:
+        """Возвращает существующие элементы из item_ids, исключая вложенные в другие элементы этого же списка."""
+        placeholders = ', '.join('?' * len(item_ids))
+        rows = conn.execute(
+            f'''
+            SELECT id FROM item
+            WHERE id IN ({placeholders}) AND NOT EXISTS (
+                SELECT 1 FROM item_closure
+                WHERE descendant = item.id AND depth > 0 AND ancestor IN ({placeholders})
+            )
+            ORDER BY id
+            ''',
+            (*item_ids, *item_ids),
         ).fetchall()
+        return [row[0] for row in rows]
+
+    @classmethod
+    def move_many(cls, item_ids: t.Sequence[int], parent_id: t.Optional[int]) -> int:
+        """
+        Переносит элементы в папку parent_id (None - на главную) одной транзакцией и возвращает их количество.
+
+        Элементы, вложенные в другие переносимые элементы, остаются на своих местах.
+        """
+        item_ids = list(dict.fromkeys(item_ids))
+
+        if not item_ids:
+            return 0
+
+        conn = cls.get_connection()
+
+        try:
+            cls._check_target_folder(conn, parent_id)
+            item_ids = cls._get_roots(conn, item_ids)
+
+            if not item_ids:
+                conn.rollback()
+                return 0
+
+            if parent_id is not None and conn.execute(
+                'SELECT 1 FROM item_closure WHERE descendant = ? AND ancestor IN ({})'.format(
+                    ', '.join('?' * len(item_ids)),
+                ),
+                (parent_id, *item_ids),
+            ).fetchone() is not None:
+                raise ValueError('Cannot move a folder into itself or its subfolder.')
+
+            placeholders = ', '.join('?' * len(item_ids))
+            old_parents = {
+                row[0] for row in conn.execute(
+                    f'SELECT DISTINCT parent_id FROM item WHERE id IN ({placeholders})', item_ids,
+                )
+            }
+            conn.execute(f'UPDATE item SET parent_id = ? WHERE id IN ({placeholders})', (parent_id, *item_ids))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        for folder_id in old_parents | {parent_id}:
+            change_feed.publish(EventType.INVALIDATE, folder_id)
+
+        return len(item_ids)
+
+    @classmethod
+    def copy_many(cls, item_ids: t.Sequence[int], parent_id: t.Optional[int]) -> int:
+        """
+        Копирует элементы вместе с вложенными в папку parent_id одной транзакцией.
+
+        Метаданные берутся из сохраненных строк, к провайдерам запросы не выполняются.
+        Возвращает количество созданных элементов.
+        """
+        item_ids = list(dict.fromkeys(item_ids))
+
+        if not item_ids:
+            return 0
+
+        columns = [f.name for f in fields(cls) if f.name not in ('id', 'parent_id', 'ts')]
+        conn = cls.get_connection()
+        created = 0
+
+        try:
+            cls._check_target_folder(conn, parent_id)
+
+            for root_id in cls._get_roots(conn, item_ids):
+                # Родитель всегда ближе к корню, поэтому при обходе по глубине его копия уже создана.
+                new_ids = {}
+                rows = conn.execute(
+                    '''
+                    SELECT item.id, item.parent_id, {}
+                    FROM item_closure JOIN item ON item.id = descendant
+                    WHERE ancestor = ?
+                    ORDER BY depth, item.id
+                    '''.format(', '.join(f'item.{c}' for c in columns)),
+                    (root_id,),
+                ).fetchall()
+
+                for item_id, old_parent_id, *values in rows:
+                    new_ids[item_id] = conn.execute(
+                        'INSERT INTO item (parent_id, {}) VALUES (?, {})'.format(
+                            ', '.join(columns), ', '.join('?' * len(columns)),
+                        ),
+                        (new_ids.get(old_parent_id, parent_id), *values),
+                    ).lastrowid
+                    created += 1
+
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        if created:
+            change_feed.publish(EventType.INVALIDATE, parent_id)
+
+        return created
+
+    @classmethod
+    def count_folders(cls, parent_id: t.Optional[int]) -> int:
+        """Возвращает количество папок в директории."""
+        return cls.get_connection().execute(
+            'SELECT COUNT(*) FROM item WHERE parent_id IS ? AND is_folder = 1', (parent_id,),
+        ).fetchone()[0]
+
+    @classmethod
+    def iter_select(
+        cls,
+        parent_id: t.Optional[int],
+        limit: int,
+        offset: int = 0,
+        after: t.Optional[str] = None,
+    ) -> t.Iterator['ItemRow']:
+        """
+        Возвращает элементы директории по мере чтения из базы: сначала папки по названию, затем остальное от новых к старым.
+
+        Если передан токен after, страница начинается сразу после элемента, из которого он получен,
+        и смещение offset игнорируется.
+        """
+        cursor = None if after is None else PageCursor.decode(after)
+        count = 0
+
+        if cursor is not None:
+            offset = 0
+
+        if cursor is None or cursor.is_folder:
+            for row in cls._select_page(parent_id, True, limit, offset, cursor):
+                count += 1
+                yield row
+
+            if count >= limit:
+                return None
+
+            # Папки закончились, остальные элементы выводятся с самого начала,
+            # а если смещение вышло за пределы папок - с остатка этого смещения.
+            offset = max(0, offset - cls.count_folders(parent_id)) if offset and not count else 0
+            cursor = None
+
+        yield from cls._select_page(parent_id, False, limit - count, offset, cursor)
+
+    @classmethod
+    def select(
+        cls,
+        parent_id: t.Optional[int],
+        limit: int,
+        offset: int = 0,
+        after: t.Optional[str] = None,
+    ) -> t.List['ItemRow']:
+        """Возвращает страницу элементов директории списком (см. iter_select)."""
+        return list(cls.iter_select(parent_id, limit, offset, after))
+
+
+def _column(index: int) -> property:
+    return property(lambda self: self._row[index])
+
+
+class ItemRow(ItemMixin):
+    """
+    Элемент директории только для чтения.
+
+    Хранит кортеж, полученный из курсора SQLite, и преобразует значения только при обращении к ним,
+    поэтому при выводе списка на каждую строку создается один небольшой объект вместо модели Item.
+    """
+    __slots__ = ('_row', '_data')
+
+    # Порядок столбцов в кортеже: поля модели, вычисляемые столбцы из ITEM_DATA_COLUMNS, размер папки.
+    SELECT = ', '.join((
+        'item.id', 'item.parent_id', 'item.item_type', 'item.is_folder', 'item.title', 'item.description',
+        'item.url', 'item.thumbnail', 'item.cover', 'item.data', 'item.ts',
+        *(f'item.data_{name}' for name in ITEM_DATA_COLUMNS),
+        'COALESCE(folder_size.items, 0)',
+    ))
+    DATA_COLUMNS = {name: i for i, name in enumerate(ITEM_DATA_COLUMNS, 11)}
+
+    id = _column(0)
+    parent_id = _column(1)
+    title = _column(4)
+    description = _column(5)
+    url = _column(6)
+    thumbnail = _column(7)
+    cover = _column(8)
+    folder_size = _column(11 + len(ITEM_DATA_COLUMNS))
+
+    def __init__(self, row: t.Tuple[t.Any, ...]) -> None:
+        self._row = row
+        self._data = None
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}(id={self.id!r}, item_type={self.item_type!r}, title={self.title!r})'
+
+    @property
+    def item_type(self) -> ItemType:
+        return ItemType(self._row[2])
+
+    @property
+    def is_folder(self) -> bool:
+        return bool(self._row[3])
+
+    @property
+    def data(self) -> t.Dict[str, t.Any]:
+        if self._data is None:
+            self._data = json.loads(self._row[9]) if self._row[9] else {}
+        return self._data
+
+    @property
+    def ts(self) -> datetime:
+        ts = self._row[10]
+        return ts if isinstance(ts, datetime) else datetime.fromisoformat(ts)
+
+    @property
+    def page_token(self) -> str:
+        """Токен для запроса следующей страницы, начиная после текущего элемента."""
+        return PageCursor(self.is_folder, self.title, str(self._row[10]), self.id).encode()
+
+    def get_data(self, name: str, default: t.Any = None) -> t.Any:
+        """Возвращает значение из data по имени вычисляемого столбца без разбора JSON."""
+        value = self._row[self.DATA_COLUMNS[name]]
+        return default if value is None else value
+
+    def as_dict(self) -> t.Dict[str, t.Any]:
+        return {
+            'id': self.id,
+            'parent_id': self.parent_id,
+            'item_type': self.item_type,
+            'is_folder': self.is_folder,
+            'title': self.title,
+            'description': self.description,
+            'url': self.url,
+            'thumbnail': self.thumbnail,
+            'cover': self.cover,
+            'data': self.data,
+            'ts': self.ts,
+        }
 
 
 # @dataclass(eq=False)
-# class Item(BaseModel):
+# class Item(BaseModel, ItemMixin):
 #     url: str
 #     title: str = ''
 #     id: t.Optional[int] = None
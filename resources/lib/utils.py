@@ -1,4 +1,7 @@
+from contextlib import contextmanager
+import importlib
 import re
+import time
 import typing as t
 
 from kodi_useful import current_addon
@@ -8,20 +11,47 @@ def get_icon(name: str) -> str:
     return current_addon.get_path('resources', 'lib', 'assets', 'icons', name)
 
 
+@contextmanager
+def log_elapsed(message: str) -> t.Iterator[None]:
+    """Пишет в отладочный журнал время выполнения блока; message может содержать {ms}."""
+    started = time.perf_counter()
+
+    try:
+        yield None
+    finally:
+        current_addon.logger.debug(message.format(ms=(time.perf_counter() - started) * 1000))
+
+
 def re_search(pattern: str, s: str) -> t.Optional[str]:
     match = re.search(pattern, s)
     return match.group(1) if match else None
 
 
+def import_string(path: str) -> t.Any:
+    """Импортирует объект по пути вида 'package.module:name'."""
+    module_name, _, name = path.partition(':')
+    return getattr(importlib.import_module(module_name), name)
+
+
 class URLConstructor:
     def __init__(self):
         self._map = {}
+        self._modules = {}
 
     def __call__(self, type_name: str, *args, **kwargs):
+        if type_name not in self._map and type_name in self._modules:
+            importlib.import_module(self._modules[type_name])
+
         if type_name not in self._map:
             raise ValueError(f'URL constructor not found: unknown type {type_name!r}')
+
         return self._map[type_name](*args, **kwargs)
 
+    def register_module(self, module_name: str, *type_names: str) -> None:
+        """Указывает модуль, при импорте которого регистрируются конструкторы для перечисленных типов."""
+        for type_name in type_names:
+            self._modules[type_name] = module_name
+
     def register(self, type_name: str):
         def decorator(func):
             self._map[type_name] = func
@@ -1,16 +1,159 @@
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import asdict, dataclass, fields
-from functools import wraps
+from datetime import datetime, timezone
+from email.utils import formatdate
+from functools import partial, wraps
+import gzip
+import hashlib
 from http import HTTPStatus
+import json
+import mimetypes
+import os
+import threading
+import time
 import typing as t
+from urllib.parse import unquote, urlsplit
 
 from kodi_useful import current_addon
 from kodi_useful.exceptions import HTTPError
 from kodi_useful.http.server import validate, HTTPServer, HTTPRequestHandler
 
-from .storage import Item
+from .events import change_feed, ChangeEvent, EventType
+from .jobs import import_queue, QueueFull
+from .parsers import parse_url_list
+from .storage import close_connection, get_folder_version, Item
 from .providers import media_provider
 
 
+# Потоки событий обслуживаются отдельными потоками вне пула запросов, их не больше SSE_MAX_STREAMS.
+# Соединение закрывается через SSE_STREAM_DURATION секунд, после чего браузер сам переподключается
+# и продолжает с последнего полученного события.
+SSE_MAX_STREAMS = 8
+SSE_STREAM_DURATION = 60
+SSE_PING_INTERVAL = 5
+
+# Файлы сборки веб-интерфейса с хэшем в имени никогда не меняются и могут кэшироваться браузером навсегда.
+IMMUTABLE_ASSETS_PREFIX = '/static/assets/'
+
+
+def json_default(obj: t.Any) -> t.Any:
+    if isinstance(obj, datetime):
+        return obj.isoformat(' ')
+    return str(obj)
+
+
+def is_not_modified(rh: HTTPRequestHandler, etag: str) -> bool:
+    """Проверяет, совпадает ли версия ресурса в кэше клиента с текущей."""
+    if_none_match = rh.headers.get('If-None-Match', '')
+    return etag in (tag.strip() for tag in if_none_match.split(','))
+
+
+def send_body(
+    rh: HTTPRequestHandler,
+    body: bytes,
+    content_type: str,
+    headers: t.Optional[t.Dict[str, str]] = None,
+) -> None:
+    """Отправляет ответ, сжимая его gzip, если клиент это поддерживает и тело достаточно большое."""
+    headers = dict(headers or {})
+    headers['Vary'] = 'Accept-Encoding'
+
+    if len(body) > 1024 and 'gzip' in rh.headers.get('Accept-Encoding', ''):
+        body = gzip.compress(body, compresslevel=6)
+        headers['Content-Encoding'] = 'gzip'
+
+    rh.send_response(HTTPStatus.OK)
+    rh.send_header('Content-Type', content_type)
+    rh.send_header('Content-Length', str(len(body)))
+
+    for name, value in headers.items():
+        rh.send_header(name, value)
+
+    rh.end_headers()
+    rh.wfile.write(body)
+
+
+def format_event(event: ChangeEvent) -> str:
+    """Возвращает событие в формате text/event-stream."""
+    data = json.dumps(event.as_dict(), default=json_default)
+    return f'id: {event.id}\nevent: {event.type}\ndata: {data}\n\n'
+
+
+def send_not_modified(rh: HTTPRequestHandler, etag: str) -> None:
+    rh.send_response(HTTPStatus.NOT_MODIFIED)
+    rh.send_header('ETag', etag)
+    rh.end_headers()
+
+
+class StaticFilesMixin:
+    """
+    Отдает файлы веб-интерфейса с заранее сжатыми копиями (.br, .gz) и заголовками кэширования.
+
+    Запросы к остальным путям передаются обработчику, к которому подмешан класс.
+    """
+
+    static_root = current_addon.get_path('resources', 'www')
+
+    def do_GET(self) -> None:
+        if not self._send_static_file():
+            super().do_GET()
+
+    def _send_static_file(self) -> bool:
+        path = unquote(urlsplit(self.path).path)
+
+        if not path.startswith('/static/'):
+            return False
+
+        root = os.path.realpath(self.static_root)
+        filename = os.path.realpath(os.path.join(root, path.lstrip('/')))
+
+        if not filename.startswith(root + os.sep) or not os.path.isfile(filename):
+            return False
+
+        stat = os.stat(filename)
+        headers = {
+            'Last-Modified': formatdate(stat.st_mtime, usegmt=True),
+            'Cache-Control': (
+                'public, max-age=31536000, immutable'
+                if path.startswith(IMMUTABLE_ASSETS_PREFIX) else
+                'no-cache'
+            ),
+            'Vary': 'Accept-Encoding',
+        }
+        accept_encoding = self.headers.get('Accept-Encoding', '')
+        etag_suffix = ''
+
+        for encoding, extension in (('br', '.br'), ('gzip', '.gz')):
+            if encoding in accept_encoding and os.path.isfile(filename + extension):
+                headers['Content-Encoding'] = encoding
+                filename += extension
+                etag_suffix = f'-{encoding}'
+                break
+
+        # Сжатые и исходное тела различаются побайтно, поэтому у каждого свой строгий ETag.
+        etag = '"%x-%x%s"' % (int(stat.st_mtime), stat.st_size, etag_suffix)
+        headers['ETag'] = etag
+
+        if is_not_modified(self, etag):
+            send_not_modified(self, etag)
+            return True
+
+        with open(filename, 'rb') as f:
+            body = f.read()
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', mimetypes.guess_type(path)[0] or 'application/octet-stream')
+        self.send_header('Content-Length', str(len(body)))
+
+        for name, value in headers.items():
+            self.send_header(name, value)
+
+        self.end_headers()
+        self.wfile.write(body)
+
+        return True
+
+
 def required_security_page(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
@@ -45,7 +188,93 @@ class SecuritySettings:
         return validate(cls, payload)
 
 
-httpd = HTTPServer()
+class ThreadPoolHTTPServer(HTTPServer):
+    """
+    HTTP сервер, который обрабатывает запросы в пуле потоков.
+
+    Медленный запрос (например, добавление ссылки с загрузкой метаданных) не блокирует остальные,
+    а у каждого соединения есть таймаут, чтобы зависший клиент не занимал поток бесконечно.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.max_workers = 4
+        self.request_timeout = 30
+        self._executor: t.Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._detached: t.Set[t.Any] = set()
+        self._streams = threading.BoundedSemaphore(SSE_MAX_STREAMS)
+        self.RequestHandlerClass = type(
+            'StaticFilesRequestHandler', (StaticFilesMixin, self.RequestHandlerClass), {},
+        )
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix='uplayer-httpd',
+                )
+            return self._executor
+
+    def configure(self, max_workers: int, request_timeout: int) -> None:
+        """Задает размер пула потоков и таймаут соединения; новый пул создается при следующем запросе."""
+        with self._executor_lock:
+            if self._executor is not None and max_workers != self.max_workers:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+            self.max_workers = max_workers
+            self.request_timeout = request_timeout
+
+    def acquire_stream(self) -> bool:
+        """Резервирует место для долгого соединения; возвращает False, если все места заняты."""
+        return self._streams.acquire(blocking=False)
+
+    def release_stream(self) -> None:
+        self._streams.release()
+
+    def detach_request(self, request, client_address, target: t.Callable[[], None]) -> None:
+        """
+        Передает соединение, место для которого зарезервировано acquire_stream, отдельному потоку.
+
+        Поток пула освобождается сразу, а соединение закрывается после завершения target.
+        """
+        with self._executor_lock:
+            self._detached.add(request)
+
+        def run() -> None:
+            try:
+                target()
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                with self._executor_lock:
+                    self._detached.discard(request)
+                self.release_stream()
+                super(ThreadPoolHTTPServer, self).shutdown_request(request)
+
+        threading.Thread(target=run, name='uplayer-httpd-stream', daemon=True).start()
+
+    def shutdown_request(self, request) -> None:
+        with self._executor_lock:
+            if request in self._detached:
+                return None
+        super().shutdown_request(request)
+
+    def process_request(self, request, client_address) -> None:
+        request.settimeout(self.request_timeout)
+        self._get_executor().submit(self._process_request_worker, request, client_address)
+
+    def _process_request_worker(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+httpd = ThreadPoolHTTPServer()
 
 
 @httpd.get('/')
@@ -55,26 +284,203 @@ def index(request_handler: HTTPRequestHandler):
 
 @httpd.get('/items')
 def list_items(rh: HTTPRequestHandler):
-    items = Item.select(
-        parent_id=rh.query.get_int('folder_id'),
-        limit=rh.query.get_int(
-            'limit', default=current_addon.get_setting('items_per_page', int)
-        ),
-        offset=rh.query.get_int('offset', default=0),
+    folder_id = rh.query.get_int('folder_id')
+    limit = rh.query.get_int('limit', default=current_addon.get_setting('items_per_page', int))
+    offset = rh.query.get_int('offset', default=0)
+    after = rh.query.get('after')
+
+    version, changed = get_folder_version(folder_id)
+    etag = '"%s-%s-%s"' % (
+        folder_id or 0, version, hashlib.md5(f'{limit}:{offset}:{after}'.encode()).hexdigest()[:8],
     )
-    return rh.send_json([i.as_dict() for i in items])
+
+    if is_not_modified(rh, etag):
+        return send_not_modified(rh, etag)
+
+    try:
+        payload = [
+            {**i.as_dict(), 'page_token': i.page_token}
+            for i in Item.iter_select(parent_id=folder_id, limit=limit, offset=offset, after=after)
+        ]
+    except ValueError as err:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, str(err))
+
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+
+    if changed:
+        headers['Last-Modified'] = formatdate(
+            datetime.fromisoformat(changed).replace(tzinfo=timezone.utc).timestamp(), usegmt=True,
+        )
+
+    send_body(rh, json.dumps(payload, default=json_default).encode('utf-8'), 'application/json', headers)
+
+
+@httpd.get('/items/search')
+def search_items(rh: HTTPRequestHandler):
+    query = rh.query.get('q', required=True)
+    limit = rh.query.get_int('limit', default=current_addon.get_setting('items_per_page', int))
+    offset = rh.query.get_int('offset', default=0)
+
+    items = Item.search(query, limit=limit + 1, offset=offset)
+    payload = {
+        'items': [i.as_dict() for i in items[:limit]],
+        'next_offset': offset + limit if len(items) > limit else None,
+    }
+    send_body(rh, json.dumps(payload, default=json_default).encode('utf-8'), 'application/json')
 
 
 @httpd.post('/items')
 def create_item(rh: HTTPRequestHandler):
     playlist = media_provider.create_item(
         title_or_url=rh.form.get('title', required=True),
-        parent_id=rh.query.get('folder_id'),
+        parent_id=rh.query.get_int('folder_id'),
     )
     playlist.save()
     return rh.send_json(playlist.as_dict())
 
 
+@httpd.post('/items/bulk')
+def create_items_bulk(rh: HTTPRequestHandler):
+    if rh.headers.get('Content-Type', '').startswith('application/json'):
+        payload = rh.json
+        urls = payload.get('urls', []) if isinstance(payload, dict) else payload
+
+        if not isinstance(urls, list) or not all(isinstance(u, str) for u in urls):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, 'Expected a list of URLs.')
+
+        urls, rejected = parse_url_list('\n'.join(urls))
+    else:
+        urls, rejected = parse_url_list(rh.form.get('urls', required=True))
+
+    if not urls:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, 'No http(s) URLs to import.')
+
+    try:
+        job = import_queue.submit(
+            urls,
+            parent_id=rh.query.get_int('folder_id'),
+            errors=[{'url': line, 'error': 'Not an http(s) URL.'} for line in rejected],
+        )
+    except QueueFull as err:
+        raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, str(err))
+
+    return rh.send_json(job.as_dict())
+
+
+@httpd.get('/items/bulk')
+def get_bulk_job(rh: HTTPRequestHandler):
+    job = import_queue.get(rh.query.get('job_id', required=True))
+
+    if job is None:
+        raise HTTPError(HTTPStatus.NOT_FOUND, 'Import job not found.')
+
+    return rh.send_json(job.as_dict())
+
+
+def run_event_stream(request, folder_id: t.Optional[int], last_id: int, version: int, chunks: t.List[str]) -> None:
+    """Отправляет события директории folder_id в сокет request, пока не истечет SSE_STREAM_DURATION."""
+    deadline = time.monotonic() + SSE_STREAM_DURATION
+
+    try:
+        while True:
+            # Пустой комментарий не дает прокси и клиенту закрыть простаивающее соединение.
+            request.sendall((''.join(chunks) or ': ping\n\n').encode('utf-8'))
+
+            if time.monotonic() >= deadline:
+                break
+
+            events, missed = change_feed.wait(last_id, timeout=SSE_PING_INTERVAL)
+            folder_events = [e for e in events if e.folder_id == folder_id]
+            new_version, _ = get_folder_version(folder_id)
+
+            if events:
+                last_id = events[-1].id
+
+            if missed or (new_version != version and not folder_events):
+                # Изменения из процесса плагина видны только по версии директории в базе данных.
+                chunks = [format_event(ChangeEvent(last_id, EventType.INVALIDATE, folder_id))]
+            else:
+                chunks = [format_event(e) for e in folder_events]
+
+            version = new_version
+    except OSError:
+        pass
+    finally:
+        close_connection()
+
+
+@httpd.get('/items/events')
+def stream_item_events(rh: HTTPRequestHandler):
+    folder_id = rh.query.get_int('folder_id')
+    last_event_id = rh.headers.get('Last-Event-ID') or rh.query.get('last_event_id') or ''
+    last_id = int(last_event_id) if last_event_id.isdigit() else 0
+    version, _ = get_folder_version(folder_id)
+    chunks = ['retry: 1000\n\n']
+
+    if last_id > change_feed.last_id:
+        # Сервис перезапускался, и счетчик событий начался заново.
+        chunks.append(format_event(ChangeEvent(change_feed.last_id, EventType.INVALIDATE, folder_id)))
+    if not last_id or last_id > change_feed.last_id:
+        last_id = change_feed.last_id
+
+    if not httpd.acquire_stream():
+        raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, 'Too many event streams.')
+
+    try:
+        rh.send_response(HTTPStatus.OK)
+        rh.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        rh.send_header('Cache-Control', 'no-cache')
+        rh.send_header('Connection', 'close')
+        rh.end_headers()
+        rh.wfile.flush()
+    except Exception:
+        httpd.release_stream()
+        raise
+
+    # Дальше соединение обслуживает отдельный поток, а поток пула возвращается к другим запросам.
+    httpd.detach_request(rh.request, rh.client_address, partial(run_event_stream, rh.request, folder_id, last_id, version, chunks))
+    rh.close_connection = True
+
+
+def get_batch_payload(rh: HTTPRequestHandler) -> t.Tuple[t.List[int], t.Optional[int]]:
+    """Возвращает идентификаторы элементов и папку назначения из тела запроса {"ids": [...], "folder_id": ...}."""
+    payload = rh.json
+    item_ids = payload.get('ids') if isinstance(payload, dict) else None
+    folder_id = payload.get('folder_id') if isinstance(payload, dict) else None
+
+    if not isinstance(item_ids, list) or not all(isinstance(i, int) for i in item_ids):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, 'Expected a list of item IDs.')
+
+    if folder_id is not None and not isinstance(folder_id, int):
+        raise HTTPError(HTTPStatus.BAD_REQUEST, 'Expected a folder ID or null.')
+
+    return item_ids, folder_id
+
+
+@httpd.post('/items/move')
+def move_items(rh: HTTPRequestHandler):
+    item_ids, folder_id = get_batch_payload(rh)
+
+    try:
+        moved = Item.move_many(item_ids, folder_id)
+    except ValueError as err:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, str(err))
+
+    return rh.send_json({'moved': moved})
+
+
+@httpd.post('/items/copy')
+def copy_items(rh: HTTPRequestHandler):
+    item_ids, folder_id = get_batch_payload(rh)
+
+    try:
+        created = Item.copy_many(item_ids, folder_id)
+    except ValueError as err:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, str(err))
+
+    return rh.send_json({'created': created})
+
+
 @httpd.delete('/items')
 def delete_item(rh: HTTPRequestHandler):
     item_id = rh.query.get('item_id', required=True)
@@ -0,0 +1,221 @@
+from dataclasses import fields
+from datetime import datetime
+import enum
+from http import HTTPStatus
+import http.server
+import json
+import os
+import sqlite3
+import sys
+import threading
+import types
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+
+
+def install_kodi_useful_stub() -> None:
+    """
+    Подменяет kodi_useful минимальной заглушкой, если библиотека недоступна.
+
+    kodi_useful - дополнение Kodi, а не пакет PyPI, поэтому без заглушки тесты вне Kodi не запустить.
+    Заглушка повторяет только то, что используют тестируемые модули: current_addon,
+    соединение и модель базы данных, исключения, HTTP сессию и HTTP сервер с маршрутами.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    class Logger:
+        def __getattr__(self, name):
+            return lambda *args, **kwargs: None
+
+    class Addon:
+        debug = False
+        logger = Logger()
+
+        def get_path(self, *parts: str) -> str:
+            return os.path.join(root, *parts)
+
+        def get_data_path(self, *parts: str) -> str:
+            return ':memory:'
+
+        def get_setting(self, name: str, type_=str):
+            return {'items_per_page': 20}.get(name, type_())
+
+    class Connection(sqlite3.Connection):
+        def __init__(self, path: str, echo: bool = False) -> None:
+            super().__init__(path, check_same_thread=False)
+
+        def executescript(self, sql: str, raw: bool = False):
+            return super().executescript(sql)
+
+    def to_db(value):
+        if isinstance(value, dict):
+            return json.dumps(value)
+        if isinstance(value, enum.Enum):
+            return str(value)
+        if isinstance(value, datetime):
+            return value.isoformat(' ')
+        return value
+
+    class Model:
+        def as_dict(self):
+            return {f.name: getattr(self, f.name) for f in fields(self)}
+
+        def save(self):
+            conn = self.get_connection()
+            table = type(self).__name__.lower()
+            values = {name: to_db(value) for name, value in self.as_dict().items()}
+
+            if self.id is None:
+                del values['id']
+                self.id = conn.execute(
+                    f'INSERT INTO {table} ({", ".join(values)}) VALUES ({", ".join("?" * len(values))})',
+                    list(values.values()),
+                ).lastrowid
+            else:
+                conn.execute(
+                    f'UPDATE {table} SET {", ".join(f"{name} = ?" for name in values)} WHERE id = ?',
+                    [*values.values(), self.id],
+                )
+
+            conn.commit()
+            return self
+
+    class HTTPError(Exception):
+        def __init__(self, status, message: str = '') -> None:
+            super().__init__(message)
+            self.status = status
+
+    class Params(dict):
+        def get(self, name: str, default=None, required: bool = False):
+            if required and name not in self:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, f'Missing parameter {name!r}.')
+            return super().get(name, default)
+
+        def get_int(self, name: str, default=None):
+            value = self.get(name)
+            return default if value in (None, '') else int(value)
+
+    class HTTPRequestHandler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def send_json(self, data) -> None:
+            body = json.dumps(data, default=str).encode('utf-8')
+            self.send_response(HTTPStatus.OK)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def dispatch(self, method: str) -> None:
+            url = urlsplit(self.path)
+            self.query = Params(parse_qsl(url.query))
+            length = int(self.headers.get('Content-Length') or 0)
+            self.form = Params(parse_qsl(self.rfile.read(length).decode('utf-8')) if length else [])
+            func = self.server.routes.get((method, url.path))
+
+            try:
+                if func is None:
+                    raise HTTPError(HTTPStatus.NOT_FOUND)
+                func(self)
+            except HTTPError as err:
+                self.send_response(err.status)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+        def do_GET(self) -> None:
+            self.dispatch('GET')
+
+        def do_POST(self) -> None:
+            self.dispatch('POST')
+
+    class HTTPServer(http.server.HTTPServer):
+        def __init__(self) -> None:
+            super().__init__(('127.0.0.1', 0), HTTPRequestHandler, bind_and_activate=False)
+            self.routes = {}
+
+        def route(self, method: str, path: str):
+            def decorator(func):
+                self.routes[method, path] = func
+                return func
+            return decorator
+
+        def get(self, path: str):
+            return self.route('GET', path)
+
+        def post(self, path: str):
+            return self.route('POST', path)
+
+        def put(self, path: str):
+            return self.route('PUT', path)
+
+        def delete(self, path: str):
+            return self.route('DELETE', path)
+
+        def set_address(self, host: str, port: int) -> None:
+            self.server_address = (host, port)
+
+        def start(self, run_in_thread: bool = False) -> None:
+            self.server_bind()
+            self.server_activate()
+            threading.Thread(target=self.serve_forever, daemon=True).start()
+
+        def stop(self) -> None:
+            self.shutdown()
+            self.server_close()
+
+    modules = {
+        'kodi_useful': {'current_addon': Addon()},
+        'kodi_useful.database': {'Connection': Connection, 'Model': Model},
+        'kodi_useful.exceptions': {
+            'HTTPError': HTTPError,
+            'MultipleObjectsFound': type('MultipleObjectsFound', (Exception,), {}),
+            'ObjectNotFound': type('ObjectNotFound', (Exception,), {}),
+        },
+        'kodi_useful.http': {},
+        'kodi_useful.http.client': {'Session': type('Session', (), {})},
+        'kodi_useful.http.server': {
+            'HTTPServer': HTTPServer,
+            'HTTPRequestHandler': HTTPRequestHandler,
+            'validate': lambda cls, payload: cls(**payload),
+        },
+    }
+
+    for name, attrs in modules.items():
+        module = types.ModuleType(name)
+        module.__dict__.update(attrs)
+        sys.modules[name] = module
+
+
+try:
+    import kodi_useful  # noqa: F401
+except ImportError:
+    install_kodi_useful_stub()
+
+
+@pytest.fixture
+def db():
+    """Соединение с пустой базой данных в памяти, к которой применены все миграции."""
+    from kodi_useful.database import Connection
+    from resources.lib import storage
+
+    conn = Connection(':memory:')
+    storage.migrate(conn)
+    storage._local.connection = conn
+
+    yield conn
+
+    storage._local.connection = None
+    conn.close()
+
+
+@pytest.fixture
+def statements(db):
+    """Список SQL запросов, выполненных через соединение db (с подставленными параметрами)."""
+    executed = []
+    db.set_trace_callback(executed.append)
+    yield executed
+    db.set_trace_callback(None)
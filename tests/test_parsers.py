@@ -0,0 +1,20 @@
+from resources.lib.parsers import parse_url_list
+
+
+def test_parse_url_list_rejects_non_http_lines():
+    text = '\n'.join([
+        '#EXTM3U',
+        '#EXTINF:-1,Video',
+        'https://rutube.ru/video/1/',
+        'video.mp4',
+        '',
+        '../a.ts',
+        'http://example.com/b',
+        'https://rutube.ru/video/1/',
+        'some note',
+    ])
+
+    urls, rejected = parse_url_list(text)
+
+    assert urls == ['https://rutube.ru/video/1/', 'http://example.com/b']
+    assert rejected == ['video.mp4', '../a.ts', 'some note']
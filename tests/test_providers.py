@@ -0,0 +1,36 @@
+import pytest
+
+from resources.lib.providers import base
+from resources.lib.storage import ItemType
+
+
+@pytest.fixture
+def fetched_artwork(monkeypatch):
+    fetched = []
+
+    def fetch_many(urls):
+        urls = list(urls)
+        fetched.extend(urls)
+        return {url: f'/artwork/{n}.jpg' for n, url in enumerate(urls)}
+
+    monkeypatch.setattr(base.artwork_cache, 'fetch_many', fetch_many)
+    return fetched
+
+
+def test_create_item_without_cover(fetched_artwork):
+    provider = base.MediaProvider()
+    provider.register_adapter(lambda url: {
+        'item_type': ItemType.RUTUBE_CHANNEL,
+        'is_folder': True,
+        'title': 'Channel',
+        'description': 'About',
+        'thumbnail': 'https://example.com/avatar.jpg',
+        'cover': None,
+        'data': {'channel_id': 1},
+    }, hosts=['rutube.ru'])
+
+    item = provider.create_item('https://rutube.ru/channel/1/')
+
+    assert fetched_artwork == ['https://example.com/avatar.jpg']
+    assert item.thumbnail == '/artwork/0.jpg'
+    assert item.data == {'channel_id': 1, 'artwork': {'thumbnail': 'https://example.com/avatar.jpg'}}
@@ -0,0 +1,62 @@
+import pytest
+
+from resources.lib.storage import Item, ItemType
+
+
+def add_items(db, parent_id=None, folders=3, videos=20):
+    for n in range(folders):
+        Item(item_type=ItemType.FOLDER, is_folder=True, title=f'Folder {n}', parent_id=parent_id).save()
+
+    for n in range(videos):
+        Item(
+            item_type=ItemType.YOUTUBE_VIDEO,
+            is_folder=False,
+            title=f'Video {n}',
+            parent_id=parent_id,
+            data={'video_id': f'v{n}', 'duration': 60 + n},
+        ).save()
+
+
+def explain(db, stmt):
+    return [row[-1] for row in db.execute(f'EXPLAIN QUERY PLAN {stmt}')]
+
+
+@pytest.mark.parametrize('is_folder, index', [
+    (True, 'item_folder_title_idx'),
+    (False, 'item_folder_ts_idx'),
+])
+@pytest.mark.parametrize('with_cursor', [False, True])
+def test_folder_listing_uses_index(db, statements, is_folder, index, with_cursor):
+    add_items(db)
+    cursor = None
+
+    if with_cursor:
+        cursor = next(i for i in Item.select(None, limit=100) if i.is_folder == is_folder).page_token
+
+    statements.clear()
+    list(Item.iter_select(None, limit=5, after=cursor))
+
+    selects = [s for s in statements if 'FROM item' in s and 'is_folder = ' + str(int(is_folder)) in s]
+    assert selects
+
+    for stmt in selects:
+        plan = explain(db, stmt)
+        assert any(f'USING INDEX {index}' in step for step in plan), plan
+        assert not any('USE TEMP B-TREE' in step for step in plan), plan
+
+
+def test_row_get_data_matches_item(db):
+    item = Item(
+        item_type=ItemType.RUTUBE_CHANNEL,
+        is_folder=True,
+        title='Channel',
+        data={'channel_id': 123, 'duration': 60, 'artwork': {'thumbnail': 'https://example.com/a.jpg'}},
+    )
+    item.save()
+
+    row = Item.select(None, limit=1)[0]
+
+    for name in ('channel_id', 'duration', 'video_id', 'artwork_thumbnail'):
+        assert row.get_data(name) == item.get_data(name)
+
+    assert row.get_data('channel_id') == 123
@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+import json
+import threading
+from urllib.request import urlopen
+
+import pytest
+
+from resources.lib import storage, webserver
+from resources.lib.storage import Item, ItemType
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    """Веб-сервер плагина на свободном порту с базой данных во временном файле, общей для всех потоков."""
+    monkeypatch.setattr(storage.current_addon, 'get_data_path', lambda *parts: str(tmp_path / 'player.db'))
+    monkeypatch.setattr(storage, '_schema_ready', False)
+
+    httpd = webserver.httpd
+    httpd.set_address('127.0.0.1', 0)
+    httpd.configure(max_workers=4, request_timeout=5)
+    httpd.start(run_in_thread=True)
+
+    yield httpd
+
+    httpd.stop()
+
+
+def request(server, path, data=None):
+    with urlopen(f'http://127.0.0.1:{server.server_port}{path}', data=data, timeout=5) as response:
+        return response.status, json.loads(response.read())
+
+
+def test_list_items_while_slow_create_is_in_flight(server, monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+
+    def create_item(title_or_url, parent_id=None):
+        started.set()
+        release.wait(10)
+        return Item(item_type=ItemType.FOLDER, is_folder=True, title=title_or_url, parent_id=parent_id)
+
+    monkeypatch.setattr(webserver.media_provider, 'create_item', create_item)
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        created = pool.submit(request, server, '/items', b'title=Slow')
+        assert started.wait(5)
+
+        listings = list(pool.map(lambda _: request(server, '/items'), range(20)))
+        assert not created.done()
+
+        release.set()
+        status, item = created.result(timeout=5)
+
+    assert [status for status, _ in listings] == [200] * 20
+    assert status == 200
+    assert item['title'] == 'Slow'
+    assert request(server, '/items')[1][0]['title'] == 'Slow'
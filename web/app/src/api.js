@@ -2,9 +2,9 @@ import axios from 'axios'
 import API from 'api-call-simplifier'
 
 
-const { apiCall, resource } = API(axios.create({
-  baseURL: import.meta.env?.DEV ? import.meta.env?.VITE_API_URL ?? '/' : '/',
-}))
+const baseURL = import.meta.env?.DEV ? import.meta.env?.VITE_API_URL ?? '/' : '/'
+
+const { apiCall, resource } = API(axios.create({ baseURL }))
 
 
 export const api = {
@@ -18,15 +18,37 @@ export const api = {
       return ctx.$request(config)
     }),
 
+    bulkCreate: apiCall('/items/bulk', 'post', ctx => (folderId, urls) => {
+      const config = ctx.makeConfig()
+
+      folderId && (config.params['folder_id'] = folderId)
+      config.data = new URLSearchParams({ urls })
+
+      return ctx.$request(config)
+    }),
+
+    bulkStatus: apiCall('/items/bulk', 'get', ctx => jobId => {
+      const config = ctx.makeConfig()
+      config.params['job_id'] = jobId
+      return ctx.$request(config)
+    }),
+
     delete: apiCall('/items', 'delete', ctx => id => {
       const config = ctx.makeConfig()
       config.params['item_id'] = id
       return ctx.request(config)
     }),
 
-    list: apiCall('/items', 'get', ctx => folderId => {
+    eventsUrl(folderId) {
+      const url = new URL('items/events', new URL(baseURL, window.location.href))
+      folderId && url.searchParams.set('folder_id', folderId)
+      return url.toString()
+    },
+
+    list: apiCall('/items', 'get', ctx => (folderId, after) => {
       const config = ctx.makeConfig()
       folderId && (config.params['folder_id'] = folderId)
+      after && (config.params['after'] = after)
       return ctx.$request(config)
     }),
 
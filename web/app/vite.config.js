@@ -1,10 +1,41 @@
+import { readdirSync, readFileSync, statSync, writeFileSync } from 'node:fs'
+import { join } from 'node:path'
 import { fileURLToPath, URL } from 'node:url'
+import { brotliCompressSync, gzipSync } from 'node:zlib'
 
 import { defineConfig } from 'vite'
 import vue from '@vitejs/plugin-vue'
 import vueDevTools from 'vite-plugin-vue-devtools'
 import { VitePWA } from 'vite-plugin-pwa'
 
+// Кладет рядом с файлами сборки сжатые копии (.gz, .br), которые веб-сервер дополнения отдает как есть.
+function precompress({ include = /\.(css|html|js|json|svg)$/, minSize = 1024 } = {}) {
+  let outDir
+
+  const walk = dir => readdirSync(dir).flatMap(name => {
+    const path = join(dir, name)
+    return statSync(path).isDirectory() ? walk(path) : [path]
+  })
+
+  return {
+    name: 'precompress',
+    apply: 'build',
+    configResolved(config) {
+      outDir = config.build.outDir
+    },
+    closeBundle() {
+      for (const file of walk(outDir)) {
+        if (!include.test(file) || statSync(file).size < minSize) {
+          continue
+        }
+        const content = readFileSync(file)
+        writeFileSync(`${file}.gz`, gzipSync(content, { level: 9 }))
+        writeFileSync(`${file}.br`, brotliCompressSync(content))
+      }
+    },
+  }
+}
+
 // https://vite.dev/config/
 export default defineConfig({
   plugins: [
@@ -27,6 +58,7 @@ export default defineConfig({
       injectRegister: null,  // отключаем регистрацию сервис-воркера
       workbox: false,        // отключаем offline и кэширование
     }),
+    precompress(),
   ],
   resolve: {
     alias: {